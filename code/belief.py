@@ -0,0 +1,423 @@
+"""Belief-space universal policy for the partB map family.
+
+:pyfunc:`partB.rollout` reads the key cell, the goal cell and the door states
+from *info* before the first step and then follows one of the 36 scenario
+policies.  Here the agent only knows the static map (walls, door cells, the
+key / goal candidates) and its own pose; everything else is observed on the
+way through a MiniGrid-style egocentric view.
+
+State
+-----
+The *physical* state `(x, y, h, k, u_0, u_1)` replaces the door bits by the
+doors the agent has unlocked itself, so it is the same in every scenario; in
+scenario *s* door *j* is open iff ``u_j or s.door_j``.  The *belief* is the
+set of :data:`partB.SCENARIOS` consistent with everything seen so far, stored
+as a 36-bit mask (bit *i* ↔ ``SCENARIOS[i]``).
+
+Observation
+-----------
+The view is the ``view_size × view_size`` square in front of the agent (the
+agent in the middle of the back row), occluded by walls and closed doors
+exactly like MiniGrid's ``process_vis``.  It always covers the agent's own
+cell and the cell in front, so every scenario of a belief agrees on the legal
+actions and on whether the goal is reached.  The partition of the 36
+scenarios by what they show from a physical state is memoized per state.
+
+Solve
+-----
+The transitions come from one :pyclass:`compiled.CompiledModel` per key
+candidate (walls and doors are shared).  Every `(state, belief)` node
+reachable from the start pose is enumerated once; the expected cost under a
+uniform prior is then a sparse Bellman recursion solved like
+:pyfunc:`stochastic.value_iteration`, and the resulting policy is evaluated
+once more without discount for its true expected cost.  Online, each step is one dict lookup
+keyed by `(state, belief)` plus one belief update ``belief & partition[obs]``.
+
+Run ``python belief.py`` for the cost comparison against full information.
+"""
+import time
+from collections import deque
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+import partB
+from compiled import N_ACTIONS, CompiledModel, compile_model
+from partA import *
+from stochastic import ACTION_ORDER
+
+N_SCENARIOS = len(partB.SCENARIOS)
+FULL_BELIEF = (1 << N_SCENARIOS) - 1
+
+# Observation: ((x, y, content), …) over the visible non-empty cells, with
+# content ∈ {"key", "goal", "open", "closed"}
+Observation = Tuple[Tuple[int, int, str], ...]
+
+
+def scenarios_of(belief: int) -> List[Tuple[int, int, int, int]]:
+    """Decode a belief mask into its list of scenarios."""
+    return [s for i, s in enumerate(partB.SCENARIOS) if belief >> i & 1]
+
+
+# ---------------------------------------------------------------------
+# ❶  Egocentric view
+# ---------------------------------------------------------------------
+
+def visible_cells(x: int, y: int, h: int, opaque: Callable[[Tuple[int, int]], bool],
+                  view_size: int = 7) -> List[Tuple[int, int]]:
+    """World cells seen by an agent at `(x, y)` facing *h*.
+
+    Port of MiniGrid's ``process_vis`` on the view square: visibility spreads
+    from the agent outwards and stops behind *opaque* cells.  Cells outside
+    the world must be reported opaque by *opaque*.
+    """
+    if view_size < 3 or view_size % 2 == 0:
+        raise ValueError(f"view_size must be odd and ≥ 3, got {view_size}")
+    fx, fy = Direction[h]
+    rx, ry = Direction[RIGHT[h]]
+    half, last = view_size // 2, view_size - 1
+
+    def world(i, j):
+        f, l = last - j, i - half
+        return x + f * fx + l * rx, y + f * fy + l * ry
+
+    mask = np.zeros((view_size, view_size), dtype=bool)
+    mask[half, last] = True
+    for j in range(last, -1, -1):
+        for i in range(0, last):
+            if not mask[i, j] or ((i, j) != (half, last) and opaque(world(i, j))):
+                continue
+            mask[i + 1, j] = True
+            if j > 0:
+                mask[i + 1, j - 1] = mask[i, j - 1] = True
+        for i in range(last, 0, -1):
+            if not mask[i, j] or ((i, j) != (half, last) and opaque(world(i, j))):
+                continue
+            mask[i - 1, j] = True
+            if j > 0:
+                mask[i - 1, j - 1] = mask[i, j - 1] = True
+    return [world(i, j) for i, j in zip(*np.nonzero(mask))]
+
+
+def _in_world(cell: Tuple[int, int]) -> bool:
+    return 0 <= cell[0] < partB.SIZE and 0 <= cell[1] < partB.SIZE
+
+
+def _scenario_view(x: int, y: int, h: int, doors: Tuple[int, ...],
+                   view_size: int) -> List[Tuple[int, int]]:
+    open_at = dict(zip(partB.DOOR_POS, doors))
+
+    def opaque(c):
+        return not _in_world(c) or c in partB.WALL_POS or open_at.get(c) == 0
+
+    return visible_cells(x, y, h, opaque, view_size)
+
+
+def _contents(scenario: Tuple[int, int, int, int], k: int, doors: Tuple[int, ...],
+              cells: List[Tuple[int, int]]) -> Observation:
+    k_idx, g_idx = scenario[:2]
+    open_at = dict(zip(partB.DOOR_POS, doors))
+    seen = []
+    for c in cells:
+        if c in open_at:
+            seen.append((*c, "open" if open_at[c] else "closed"))
+        elif not k and c == partB.KEY_CAND[k_idx]:
+            seen.append((*c, "key"))
+        elif c == partB.GOAL_CAND[g_idx]:
+            seen.append((*c, "goal"))
+    return tuple(sorted(seen))
+
+
+def _doors(scenario: Tuple[int, int, int, int], state: Tuple) -> Tuple[int, ...]:
+    """Actual door bits of physical *state* in *scenario*."""
+    return tuple(int(u or d) for u, d in zip(state[4:], scenario[2:]))
+
+
+def observe_scenario(scenario: Tuple[int, int, int, int], state: Tuple,
+                     view_size: int = 7) -> Observation:
+    """What *scenario* shows from physical *state*."""
+    x, y, h, k = state[:4]
+    doors = _doors(scenario, state)
+    return _contents(scenario, k, doors, _scenario_view(x, y, h, doors, view_size))
+
+
+def observe_env(env, state: Tuple, view_size: int = 7) -> Observation:
+    """Read the observation of physical *state* off a MiniGrid *env*."""
+    grid = env.unwrapped.grid
+    x, y, h = state[:3]
+
+    def opaque(c):
+        if not _in_world(c):
+            return True
+        cell = grid.get(*c)
+        return cell is not None and (cell.type == "wall" or
+                                     (cell.type == "door" and not cell.is_open))
+
+    seen = []
+    for c in visible_cells(x, y, h, opaque, view_size):
+        cell = grid.get(*c) if _in_world(c) else None
+        if cell is None:
+            continue
+        if cell.type == "door":
+            seen.append((*c, "open" if cell.is_open else "closed"))
+        elif cell.type in ("key", "goal"):
+            seen.append((*c, cell.type))
+    return tuple(sorted(seen))
+
+
+# ---------------------------------------------------------------------
+# ❷  Belief model
+# ---------------------------------------------------------------------
+
+class BeliefModel:
+    """Shared transitions and memoized observation partitions.
+
+    Parameters
+    ----------
+    view_size : int
+        Side of the (odd) egocentric view square; MiniGrid uses 7.
+    """
+
+    def __init__(self, view_size: int = 7):
+        self.view_size = view_size
+        self.models: Dict[int, CompiledModel] = {
+            k_idx: compile_model(partB.scenario_info((k_idx, 0, 0, 0)))
+            for k_idx in range(len(partB.KEY_CAND))
+        }
+        self._partitions: Dict[Tuple, Dict[Observation, int]] = {}
+        self._views: Dict[Tuple, List[Tuple[int, int]]] = {}
+
+    def partition(self, state: Tuple) -> Dict[Observation, int]:
+        """Observation → mask of the scenarios showing it from *state*."""
+        part = self._partitions.get(state)
+        if part is None:
+            part = {}
+            x, y, h, k = state[:4]
+            for i, scenario in enumerate(partB.SCENARIOS):
+                doors = _doors(scenario, state)
+                cells = self._views.get((x, y, h) + doors)
+                if cells is None:
+                    cells = self._views[(x, y, h) + doors] = _scenario_view(
+                        x, y, h, doors, self.view_size)
+                obs = _contents(scenario, k, doors, cells)
+                part[obs] = part.get(obs, 0) | 1 << i
+            self._partitions[state] = part
+        return part
+
+    def split(self, state: Tuple, belief: int) -> List[int]:
+        """Non-empty posteriors of *belief* after observing from *state*."""
+        return [b for b in (belief & m for m in self.partition(state).values()) if b]
+
+    def _compiled(self, state: Tuple, belief: int) -> Tuple[CompiledModel, int, Tuple[int, ...]]:
+        # any scenario of the belief agrees on everything the next step needs
+        scenario = partB.SCENARIOS[(belief & -belief).bit_length() - 1]
+        doors = _doors(scenario, state)
+        model = self.models[scenario[0]]
+        return model, model.index(state[:4] + doors), doors
+
+    def legal(self, state: Tuple, belief: int) -> List[int]:
+        model, i, _ = self._compiled(state, belief)
+        return [u for u in range(N_ACTIONS) if model.succ[i, u] >= 0]
+
+    def step(self, state: Tuple, belief: int, action: int) -> Tuple:
+        """Physical successor of *state* under *action*."""
+        model, i, doors = self._compiled(state, belief)
+        j = model.succ[i, action]
+        if j < 0:
+            raise ValueError(f"Action {action} is illegal in {state} under belief {belief:#x}")
+        x, y, h, k, *nxt = model.states[j]
+        unlocked = tuple(int(u or (n and not d)) for u, n, d in zip(state[4:], nxt, doors))
+        return (x, y, h, k) + unlocked
+
+    def at_goal(self, state: Tuple, belief: int) -> bool:
+        scenario = partB.SCENARIOS[(belief & -belief).bit_length() - 1]
+        return tuple(state[:2]) == partB.GOAL_CAND[scenario[1]]
+
+
+# ---------------------------------------------------------------------
+# ❸  Offline solve
+# ---------------------------------------------------------------------
+
+class BeliefPolicy:
+    """Universal policy over `(state, belief)` nodes.
+
+    Attributes
+    ----------
+    model : BeliefModel
+    table : dict
+        `(state, belief)` → action for every reachable node.
+    value : dict
+        `(state, belief)` → discounted expected cost-to-go under a uniform
+        prior over the scenarios of *belief* (the quantity that was solved).
+    cost  : dict
+        `(state, belief)` → undiscounted expected cost of following *table*.
+    """
+
+    def __init__(self, model: BeliefModel, table: Dict[Tuple[Tuple, int], int],
+                 value: Dict[Tuple[Tuple, int], float],
+                 cost: Dict[Tuple[Tuple, int], float]):
+        self.model, self.table = model, table
+        self.value, self.cost = value, cost
+
+    def __getitem__(self, node: Tuple[Tuple, int]) -> int:
+        return self.table[node]
+
+    def __len__(self) -> int:
+        return len(self.table)
+
+    def update(self, state: Tuple, belief: int, obs: Observation) -> int:
+        """Posterior of *belief* after seeing *obs* from *state*."""
+        posterior = belief & self.model.partition(state).get(obs, 0)
+        if not posterior:
+            raise RuntimeError(f"Observation {obs} from {state} contradicts every scenario")
+        return posterior
+
+    def expected_cost(self, start: Tuple, belief: int = FULL_BELIEF) -> float:
+        """Undiscounted expected cost from pose *start* = `(x, y, h)` before
+        the first observation (the mean rollout cost over *belief*)."""
+        s0 = tuple(start) + (0, 0, 0)
+        n = bin(belief).count("1")
+        return sum(bin(b).count("1") / n * self.cost[(s0, b)]
+                   for b in self.model.split(s0, belief))
+
+
+def solve_belief(start: Tuple = (4, 8, 3), view_size: int = 7, T: int = 300,
+                 gamma: float = 0.99, tol: float = 1e-6,
+                 model: Optional[BeliefModel] = None) -> BeliefPolicy:
+    """Solve the belief MDP reachable from pose *start* = `(x, y, h)`.
+
+    Parameters
+    ----------
+    start : tuple
+        Initial `(x, y, h)`; the agent starts without key and with every
+        door as the scenario made it.
+    T, gamma, tol
+        As in :pyfunc:`stochastic.value_iteration`; non-goal nodes are capped
+        at the terminal cost 1e4 of :pyfunc:`partA.terminal_cost`.
+    """
+    model = model or BeliefModel(view_size)
+    s0 = tuple(start) + (0, 0, 0)
+
+    # -- enumerate the reachable (state, belief) nodes -------------------
+    nodes: List[Tuple[Tuple, int]] = [(s0, b) for b in model.split(s0, FULL_BELIEF)]
+    index = {node: i for i, node in enumerate(nodes)}
+    rows_node, rows_action, indptr, indices, data = [], [], [0], [], []
+    queue = deque(range(len(nodes)))
+    while queue:
+        i = queue.popleft()
+        state, belief = nodes[i]
+        if model.at_goal(state, belief):
+            continue
+        n_b = bin(belief).count("1")
+        for u in model.legal(state, belief):
+            nxt = model.step(state, belief, u)
+            for b in model.split(nxt, belief):
+                j = index.get((nxt, b))
+                if j is None:
+                    j = index[(nxt, b)] = len(nodes)
+                    nodes.append((nxt, b))
+                    queue.append(j)
+                indices.append(j)
+                data.append(bin(b).count("1") / n_b)
+            rows_node.append(i)
+            rows_action.append(u)
+            indptr.append(len(indices))
+
+    # -- expected-cost value iteration ----------------------------------
+    n = len(nodes)
+    rows_node, rows_action = np.array(rows_node), np.array(rows_action)
+    indptr, indices, data = np.array(indptr), np.array(indices), np.array(data)
+    row_cost = np.array([step_cost(u) for u in range(N_ACTIONS)])[rows_action]
+    term = np.array([0.0 if model.at_goal(s, b) else 1e4 for s, b in nodes])
+    Q = np.full((n, N_ACTIONS), np.inf)
+    V_next = term.copy()
+    for _ in range(T):
+        Q[rows_node, rows_action] = row_cost + gamma * np.add.reduceat(
+            data * V_next[indices], indptr[:-1])
+        V_curr = np.minimum(Q.min(axis=1), term)
+        if np.all(np.abs(V_curr - V_next) < tol):
+            break
+        V_next = V_curr
+    Q[rows_node, rows_action] = row_cost + gamma * np.add.reduceat(
+        data * V_next[indices], indptr[:-1])
+    PI = ACTION_ORDER[np.argmin(Q[:, ACTION_ORDER], axis=1)]
+
+    # -- undiscounted evaluation of PI ----------------------------------
+    chosen = rows_action == PI[rows_node]
+    C = term.copy()
+    for _ in range(n):
+        row_val = row_cost + np.add.reduceat(data * C[indices], indptr[:-1])
+        C_next = term.copy()
+        C_next[rows_node[chosen]] = np.minimum(row_val[chosen], 1e4)
+        if np.array_equal(C_next, C):
+            break
+        C = C_next
+
+    table = {node: int(PI[i]) for i, node in enumerate(nodes) if not model.at_goal(*node)}
+    value = {node: float(V_next[i]) for i, node in enumerate(nodes)}
+    cost = {node: float(C[i]) for i, node in enumerate(nodes)}
+    return BeliefPolicy(model, table, value, cost)
+
+
+# ---------------------------------------------------------------------
+# ❹  Online execution
+# ---------------------------------------------------------------------
+
+def stream_belief(policy: BeliefPolicy, start: Tuple,
+                  observe: Callable[[Tuple], Observation],
+                  max_steps: Optional[int] = None) -> Iterator[Tuple[int, Tuple, int]]:
+    """Yield `(action, next_state, belief)` until the goal is reached.
+
+    *observe(state)* returns the observation at the current physical state.
+    When it reads a live environment (see :pyfunc:`belief_actions`), the
+    caller must execute each action before asking for the next one.
+    """
+    state, belief = tuple(start) + (0, 0, 0), FULL_BELIEF
+    for _ in range(max_steps or len(policy)):
+        belief = policy.update(state, belief, observe(state))
+        if policy.model.at_goal(state, belief):
+            return
+        a = policy[state, belief]
+        state = policy.model.step(state, belief, a)
+        yield a, state, belief
+    raise RuntimeError("Belief rollout did not reach the goal")
+
+
+def belief_actions(policy: BeliefPolicy, env) -> Iterator[int]:
+    """Actions for *env*, observed from the env itself as it is executed
+    (e.g. by :pyfunc:`utils.draw_gif_from_seq`); nothing is read upfront
+    except the agent's own pose."""
+    u = env.unwrapped
+    heading = {(1, 0): 0, (0, 1): 1, (-1, 0): 2, (0, -1): 3}[tuple(int(v) for v in u.dir_vec)]
+    start = (int(u.agent_pos[0]), int(u.agent_pos[1]), heading)
+    observe = lambda s: observe_env(env, s, policy.model.view_size)
+    return (a for a, _, _ in stream_belief(policy, start, observe))
+
+
+def simulate(policy: BeliefPolicy, scenario: Tuple[int, int, int, int],
+             start: Tuple = (4, 8, 3)) -> List[int]:
+    """Belief-policy action list when the world is *scenario*."""
+    observe = lambda s: observe_scenario(scenario, s, policy.model.view_size)
+    return [a for a, _, _ in stream_belief(policy, start, observe)]
+
+
+if __name__ == "__main__":
+    from reduction import solve_dense
+
+    models, PI_full = solve_dense()
+    full = []
+    for k_idx, g_idx, d1, d2 in partB.SCENARIOS:
+        info = partB.scenario_info((k_idx, g_idx, d1, d2))
+        pol = {x: int(u) for x, u in zip(models[k_idx].states, PI_full[(k_idx, g_idx)])}
+        full.append(sum(c for _, _, c in stream_policy(pol, (4, 8, 3, 0, d1, d2), info)))
+
+    for view_size in (7, 5, 3):
+        t0 = time.perf_counter()
+        policy = solve_belief(view_size=view_size)
+        t_solve = time.perf_counter() - t0
+
+        costs = [sum(step_cost(a) for a in simulate(policy, s)) for s in partB.SCENARIOS]
+        print(f"[belief] view {view_size}x{view_size}: {len(policy)} (state, belief) nodes "
+              f"solved in {t_solve:.2f}s, expected cost {policy.expected_cost((4, 8, 3)):.2f}")
+        print(f"  mean cost over 36 scenarios: belief {np.mean(costs):.2f} vs full "
+              f"information {np.mean(full):.2f} (worst gap {max(np.subtract(costs, full)):.1f})")
@@ -0,0 +1,73 @@
+"""Import-time guard for the planning core.
+
+Imports the planning modules in a fresh interpreter (best of ``--repeat``
+runs) and fails if
+
+* any rendering / gym / plotting module gets imported along the way, or
+* the import costs more than ``--budget`` seconds on top of NumPy alone.
+
+Usage:  python bench_import.py [--budget 0.05] [--repeat 5]
+"""
+import argparse
+import os
+import subprocess
+import sys
+
+# Modules the planning path must import with NumPy only
+CORE = ["partA", "partB", "compiled", "compress", "stochastic", "reduction", "fleet",
+        "timed", "library", "belief", "multiagent", "doorkey"]
+# Modules that may only be loaded on first use
+LAZY = ["gymnasium", "minigrid", "matplotlib", "imageio", "pygame"]
+
+_PROBE = """
+import sys, time
+t0 = time.perf_counter()
+import {modules}
+dt = time.perf_counter() - t0
+print(dt, ",".join(m for m in {lazy!r} if m in sys.modules))
+"""
+
+
+def probe(modules):
+    """Return `(seconds, eagerly_loaded_lazy_modules)` for one fresh import."""
+    code = _PROBE.format(modules=", ".join(modules), lazy=LAZY)
+    proc = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True,
+                          cwd=os.path.dirname(os.path.abspath(__file__)))
+    if proc.returncode != 0:
+        last = (proc.stderr.strip().splitlines() or ["no output"])[-1]
+        raise RuntimeError(f"importing {', '.join(modules)} failed: {last}")
+    out = proc.stdout.split()
+    return float(out[0]), [m for m in (out[1:] or [""])[0].split(",") if m]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--budget", type=float, default=0.05,
+                        help="allowed import time on top of numpy, seconds")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    try:
+        t_numpy = min(probe(["numpy"])[0] for _ in range(args.repeat))
+        runs = [probe(CORE) for _ in range(args.repeat)]
+    except RuntimeError as exc:
+        print(f"FAIL: {exc}")
+        sys.exit(1)
+    t_core = min(t for t, _ in runs)
+    eager = sorted({m for _, loaded in runs for m in loaded})
+
+    print(f"numpy alone        : {1e3 * t_numpy:7.1f} ms")
+    print(f"planning core      : {1e3 * t_core:7.1f} ms  ({', '.join(CORE)})")
+    print(f"overhead over numpy: {1e3 * (t_core - t_numpy):7.1f} ms  (budget {1e3 * args.budget:.0f} ms)")
+    failed = False
+    if eager:
+        print(f"FAIL: eagerly imported {', '.join(eager)}")
+        failed = True
+    if t_core - t_numpy > args.budget:
+        print("FAIL: import-time budget exceeded")
+        failed = True
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""Array ("compiled") form of the DoorKey state model.
+
+:pyfunc:`partA.enumerate_state`, :pyfunc:`partA.legal_actions` and
+:pyfunc:`partA.transition` describe the MDP one state tuple at a time.  This
+module evaluates them **once** per map and stores the result as dense NumPy
+arrays over a contiguous state index, which is what the table-based tools
+(compression, vectorised solvers, …) operate on.
+"""
+import numpy as np
+from typing import List, Sequence, Tuple
+
+from partA import *
+
+# Number of primitive actions (MF, TL, TR, PK, UD ↔ columns 0‥4)
+N_ACTIONS = 5
+
+
+# ---------------------------------------------------------------------
+# ❶  Compiled model
+# ---------------------------------------------------------------------
+
+class CompiledModel:
+    """Dense successor table of one map.
+
+    Attributes
+    ----------
+    info    : dict
+        The *info* dictionary the model was compiled from.
+    dims    : tuple[int]
+        Size of every state component `(W, H, 4, 2, 2, …)`.
+    strides : np.ndarray
+        Index stride of every component; `index = Σ state[i] * strides[i]`
+        reproduces the order of :pyfunc:`partA.enumerate_state`.
+    states  : list[tuple]
+        State tuples in index order.
+    coords  : np.ndarray, shape (n, len(dims))
+        The same states as an integer matrix.
+    succ    : np.ndarray, shape (n, 5)
+        Successor index per action, ``-1`` where the action is illegal.
+    cost    : np.ndarray, shape (5,)
+        Stage cost per action.
+
+    The goal is *not* part of the compiled model: the same transitions serve
+    every goal cell, see :pyfunc:`terminal`.
+    """
+
+    def __init__(self, info: dict):
+        self.info = info
+        door_bits = max(1, len(info.get("door_pos", [])))
+        self.dims = (info["width"], info["height"], 4, 2) + (2,) * door_bits
+
+        # enumerate_state packs the door bits as d_mask = Σ door_i << i,
+        # i.e. door 0 is the fastest-varying component
+        strides = [1 << i for i in range(door_bits)]
+        s = 1 << door_bits
+        for size in reversed(self.dims[:4]):  # k, h, y, x
+            strides.insert(0, s)
+            s *= size
+        self.strides = np.array(strides, dtype=np.int64)
+
+        self.states: List[Tuple] = enumerate_state(info)
+        self.coords = np.array(self.states, dtype=np.int64)
+        self.n = len(self.states)
+        assert np.array_equal(self.coords @ self.strides, np.arange(self.n))
+
+        self.succ = np.full((self.n, N_ACTIONS), -1, dtype=np.int32)
+        for i, x in enumerate(self.states):
+            for u in legal_actions(x, info):
+                x_next, _ = transition(x, u, info)
+                self.succ[i, u] = self.index(x_next)
+        self.cost = np.array([step_cost(u) for u in range(N_ACTIONS)])
+
+    def index(self, state: Sequence[int]) -> int:
+        """Dense index of a state tuple."""
+        return int(sum(int(v) * int(s) for v, s in zip(state, self.strides)))
+
+    def terminal(self, goal) -> np.ndarray:
+        """Vector form of :pyfunc:`partA.terminal_cost` for goal cell *goal*."""
+        gx, gy = to_tuple(goal)
+        at_goal = (self.coords[:, 0] == gx) & (self.coords[:, 1] == gy)
+        return np.where(at_goal, 0.0, 1e4)
+
+    def start_indices(self, door_open: Sequence[int]) -> np.ndarray:
+        """Indices of every key-less state with initial door bits *door_open*
+        whose agent cell is free (not a wall, not a door)."""
+        mask = self.coords[:, 3] == 0
+        for i, bit in enumerate(door_open):
+            mask &= self.coords[:, 4 + i] == int(bit)
+        blocked = set(self.info.get("wall_pos", set()))
+        blocked |= {to_tuple(p) for p in self.info.get("door_pos", [])}
+        for bx, by in blocked:
+            mask &= ~((self.coords[:, 0] == bx) & (self.coords[:, 1] == by))
+        return np.flatnonzero(mask)
+
+    def reachable(self, starts) -> np.ndarray:
+        """Boolean mask of states reachable from index set *starts*."""
+        seen = np.zeros(self.n, dtype=bool)
+        frontier = np.unique(np.asarray(starts, dtype=np.int64))
+        seen[frontier] = True
+        while frontier.size:
+            nxt = self.succ[frontier].ravel()
+            nxt = np.unique(nxt[nxt >= 0])
+            frontier = nxt[~seen[nxt]]
+            seen[frontier] = True
+        return seen
+
+
+def compile_model(info: dict) -> CompiledModel:
+    """Compile *info* (which must include `wall_pos`) into array form."""
+    return CompiledModel(info)
@@ -0,0 +1,244 @@
+"""Compact, run-length encoded policy tables for memory-constrained targets.
+
+A policy dict (state tuple → action) is flattened over the dense state index
+of :pyclass:`compiled.CompiledModel`, the state components are re-ordered so
+that equal actions form long runs, and the table is stored as two flat
+arrays: the index at which each run starts and the action of the run.  A
+lookup is one dot product plus a binary search, i.e. O(log runs).
+
+States that cannot be reached (from any free start cell with the scenario's
+initial door configuration) are *don't-care* entries: they simply extend the
+neighbouring run.  Every reachable state is verified bit-exact against the
+uncompressed policy.
+
+Run ``python compress.py`` for the compression / latency report over the
+36 partB scenarios.
+"""
+import itertools
+import math
+import pickle
+import time
+from array import array
+from bisect import bisect_right
+from operator import mul
+from typing import Dict, Optional, Sequence, Tuple
+
+import numpy as np
+
+from compiled import CompiledModel, compile_model
+
+# Sentinel stored for states without a legal action (policy value ``None``)
+NO_ACTION = 255
+
+
+# ---------------------------------------------------------------------
+# ❶  Compressed policy
+# ---------------------------------------------------------------------
+
+class CompressedPolicy:
+    """Read-only, dict-like view of a run-length encoded policy.
+
+    Attributes
+    ----------
+    strides : tuple[int]
+        Index stride of every state component in the chosen run order.
+    starts  : array('I')
+        First (re-ordered) index of every run, ascending.
+    values  : bytes
+        Action of every run (:data:`NO_ACTION` for ``None``).
+    n       : int
+        Number of logical states covered by the table.
+    """
+
+    def __init__(self, strides: Sequence[int], starts: Sequence[int],
+                 values: Sequence[int], n: int):
+        self.strides = tuple(int(s) for s in strides)
+        self.starts = array("I", starts)
+        self.values = bytes(values)
+        self.n = n
+
+    def __getitem__(self, state: Tuple) -> Optional[int]:
+        idx = sum(map(mul, state, self.strides))
+        a = self.values[bisect_right(self.starts, idx) - 1]
+        return None if a == NO_ACTION else a
+
+    def __len__(self) -> int:
+        return self.n
+
+    @property
+    def nbytes(self) -> int:
+        """Payload size in bytes (run starts + run values + strides)."""
+        return (self.starts.itemsize * len(self.starts) + len(self.values)
+                + 4 * len(self.strides))
+
+
+# ---------------------------------------------------------------------
+# ❷  Compression
+# ---------------------------------------------------------------------
+
+def dense_policy(policy: Dict[Tuple, int], model: CompiledModel) -> np.ndarray:
+    """Return *policy* as a uint8 array over the model's state index."""
+    return np.array(
+        [NO_ACTION if policy[x] is None else policy[x] for x in model.states],
+        dtype=np.uint8,
+    )
+
+
+def _runs(table: np.ndarray, care: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Run-length encode *table*; entries with ``care == False`` may take any
+    value and are absorbed into the preceding (or first) cared-for run."""
+    pos = np.where(care, np.arange(table.size), 0)
+    first = int(np.argmax(care))
+    pos[:first] = first
+    filled = table[np.maximum.accumulate(pos)]
+    starts = np.flatnonzero(np.r_[True, filled[1:] != filled[:-1]])
+    return starts, filled[starts]
+
+
+def _orders(n_dims: int, n_runs, max_orders: int) -> Tuple[int, ...]:
+    """Component order (slowest first) with the fewest runs.
+
+    Exhaustive when ``n_dims!`` fits in *max_orders*.  Otherwise every order
+    of `(x, y, h, k)` with the door bits fastest is tried, and the best one is
+    refined by swapping pairs of components while that helps, all within
+    *max_orders* evaluations.
+    """
+    if math.factorial(n_dims) <= max_orders:
+        return min(itertools.permutations(range(n_dims)), key=n_runs)
+    doors = tuple(range(4, n_dims))
+    best = min((p + doors for p in itertools.permutations(range(4))), key=n_runs)
+    best_runs, budget = n_runs(best), max_orders - 24
+    improved = True
+    while improved and budget > 0:
+        improved = False
+        for i, j in itertools.combinations(range(n_dims), 2):
+            if budget <= 0:
+                break
+            cand = list(best)
+            cand[i], cand[j] = cand[j], cand[i]
+            cand = tuple(cand)
+            runs = n_runs(cand)
+            budget -= 1
+            if runs < best_runs:
+                best, best_runs, improved = cand, runs, True
+    return best
+
+
+def compress_policy(policy: Dict[Tuple, int], model: CompiledModel,
+                    care: Optional[np.ndarray] = None,
+                    max_orders: int = 720) -> CompressedPolicy:
+    """Compress one policy, choosing the component order with fewest runs.
+
+    Parameters
+    ----------
+    policy : dict
+        State tuple → action, as returned by :pyfunc:`partA.backward_dp`.
+    model  : CompiledModel
+        Compiled map the policy belongs to.
+    care   : np.ndarray[bool], optional
+        States whose action must be preserved (default: all of them).
+    max_orders : int
+        Number of component orders evaluated at most.  The default searches
+        all orders up to two doors and switches to a greedy search beyond
+        (see :pyfunc:`_orders`), so the cost no longer grows factorially
+        with the door count.
+
+    Raises
+    ------
+    RuntimeError
+        If the compressed table disagrees with *policy* on a cared-for state.
+    """
+    if care is None:
+        care = np.ones(model.n, dtype=bool)
+    # scatter into one array axis per state component (the dense index packs
+    # the door bits little-endian, so a plain reshape would swap them)
+    axes = tuple(model.coords.T)
+    table = np.empty(model.dims, dtype=np.uint8)
+    table[axes] = dense_policy(policy, model)
+    care_nd = np.empty(model.dims, dtype=bool)
+    care_nd[axes] = care
+
+    def runs(order):
+        return _runs(table.transpose(order).ravel(), care_nd.transpose(order).ravel())
+
+    order = _orders(len(model.dims), lambda o: runs(o)[0].size, max_orders)
+    starts, values = runs(order)
+
+    # strides of the transposed (C-contiguous) layout, mapped back to the
+    # original component positions
+    sizes = [model.dims[o] for o in order]
+    t_strides = np.cumprod([1] + sizes[::-1])[:-1][::-1]
+    strides = np.empty(len(order), dtype=np.int64)
+    strides[list(order)] = t_strides
+
+    compressed = CompressedPolicy(strides, starts, values, model.n)
+    bad = [x for x, c in zip(model.states, care) if c and compressed[x] != policy[x]]
+    if bad:
+        raise RuntimeError(f"Compression mismatch on {len(bad)} states, e.g. {bad[0]}")
+    return compressed
+
+
+def compress_universal(policies=None) -> Dict[Tuple[int, int, int, int], CompressedPolicy]:
+    """Compress the partB universal table (defaults to
+    :pyfunc:`partB.precompute_policies`), preserving every state reachable
+    in the respective scenario."""
+    import partB
+
+    if policies is None:
+        policies = partB.precompute_policies()
+    compressed = {}
+    for scenario, policy in policies.items():
+        model = compile_model(partB.scenario_info(scenario))
+        care = model.reachable(model.start_indices(scenario[2:]))
+        compressed[scenario] = compress_policy(policy, model, care)
+    return compressed
+
+
+# ---------------------------------------------------------------------
+# ❸  Report
+# ---------------------------------------------------------------------
+
+def _lookup_ns(policy, states, repeat: int = 5) -> float:
+    """Best-of-*repeat* mean lookup latency over *states*, in nanoseconds."""
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        for x in states:
+            policy[x]
+        best = min(best, time.perf_counter() - t0)
+    return 1e9 * best / len(states)
+
+
+def report(policies, compressed) -> None:
+    """Print size and lookup latency of *compressed* vs the dict tables."""
+    import partB
+
+    dict_bytes = sum(len(pickle.dumps(p)) for p in policies.values())
+    dense_bytes = sum(len(p) for p in policies.values())  # one uint8 per state
+    comp_bytes = sum(c.nbytes for c in compressed.values())
+    runs = sum(len(c.starts) for c in compressed.values())
+    print(f"scenarios          : {len(compressed)}")
+    print(f"runs (total)       : {runs}")
+    print(f"dict (pickled)     : {dict_bytes:>9,d} B")
+    print(f"dense uint8 table  : {dense_bytes:>9,d} B")
+    print(f"run-length table   : {comp_bytes:>9,d} B "
+          f"(×{dict_bytes / comp_bytes:.0f} vs dict, ×{dense_bytes / comp_bytes:.1f} vs dense)")
+
+    t_dict = t_comp = 0.0
+    for scenario, c in compressed.items():
+        model = compile_model(partB.scenario_info(scenario))
+        care = model.reachable(model.start_indices(scenario[2:]))
+        states = [x for x, k in zip(model.states, care) if k]
+        t_dict += _lookup_ns(policies[scenario], states)
+        t_comp += _lookup_ns(c, states)
+    k = len(compressed)
+    print(f"lookup latency     : dict {t_dict / k:.0f} ns, run-length {t_comp / k:.0f} ns")
+
+
+if __name__ == "__main__":
+    import partB
+
+    policies = partB.precompute_policies()
+    compressed = compress_universal(policies)  # raises on any mismatch
+    print("[compress] verified bit-exact on every reachable state")
+    report(policies, compressed)
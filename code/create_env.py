@@ -1,3 +1,6 @@
+import argparse
+import os
+from concurrent.futures import ProcessPoolExecutor
 import gymnasium as gym
 from gymnasium.envs.registration import register
 import matplotlib.pyplot as plt
@@ -13,6 +16,7 @@ KEY = 2
 AGENT = 3
 DOOR = 4
 GOAL = 5
+OPEN_DOOR = 6  # bulk corpora only: a door that starts open
 
 RIGHT = 0
 DOWN = 1
@@ -199,12 +203,174 @@ def create_random_envs():
                         pickle.dump(env_wrapper, f)
 
 
+# ---------------------------------------------------------------------
+# Bulk procedural generation
+# ---------------------------------------------------------------------
+#
+# A bulk corpus is one compressed ``.npz`` with
+#     grids : uint8 (N, size, size)  cell codes, indexed [row, column]
+#     dirs  : uint8 (N,)             agent heading (RIGHT/DOWN/LEFT/UP)
+#     seeds : int64 (N,)             seed of every layout
+# Nothing touches gym while generating; PNG previews and pickled envs are
+# produced on demand by `export_bulk_envs`, and `utils.load_corpus` turns the
+# grids straight into planner `info` dicts.
+
+
+def generate_layout(seed, size=10, n_doors=2, key_candidates=None, goal_candidates=None, p_open=0.5):
+    """Return `(grid, agent_dir)` of one seeded DoorKey layout.
+
+    The room is walled, split by a vertical wall with `n_doors` doors (each
+    open with probability `p_open`); agent and key are on the left, the goal
+    on the right.  `key_candidates` / `goal_candidates` restrict the key and
+    goal to the given (column, row) cells.
+    """
+    if size < 5 or not 1 <= n_doors <= size - 2:
+        raise ValueError(f"Invalid bulk layout: size={size}, n_doors={n_doors}")
+    rng = np.random.default_rng(seed)
+    grid = np.full((size, size), FLOOR, dtype=np.uint8)
+    grid[0, :] = grid[-1, :] = grid[:, 0] = grid[:, -1] = WALL
+
+    # the split column must leave a key candidate on its left and a goal
+    # candidate on its right, otherwise the layout is unsolvable
+    splits = [
+        s for s in range(2, size - 2)
+        if (key_candidates is None or any(1 <= c < s for c, _ in key_candidates))
+        and (goal_candidates is None or any(s < c < size - 1 for c, _ in goal_candidates))
+    ]
+    if not splits:
+        raise ValueError(f"No split column separates key candidates {key_candidates} "
+                         f"from goal candidates {goal_candidates}")
+    split = splits[int(rng.integers(len(splits)))]
+    grid[1:-1, split] = WALL
+    for row in rng.choice(np.arange(1, size - 1), size=n_doors, replace=False):
+        grid[row, split] = OPEN_DOOR if rng.random() < p_open else DOOR
+
+    def place(code, candidates, columns):
+        if candidates is None:
+            free = [(c, r) for r in range(1, size - 1) for c in columns if grid[r, c] == FLOOR]
+        else:
+            free = [(c, r) for c, r in candidates if c in columns and grid[r, c] == FLOOR]
+        if not free:
+            raise ValueError(f"No free cell for layout code {code} (seed {seed})")
+        c, r = free[int(rng.integers(len(free)))]
+        grid[r, c] = code
+
+    place(KEY, key_candidates, range(1, split))
+    place(GOAL, goal_candidates, range(split + 1, size - 1))
+    place(AGENT, None, range(1, split))
+    return grid, int(rng.integers(4))
+
+
+def _generate_chunk(args):
+    seeds, size, n_doors, key_candidates, goal_candidates, p_open = args
+    grids = np.empty((len(seeds), size, size), dtype=np.uint8)
+    dirs = np.empty(len(seeds), dtype=np.uint8)
+    for n, seed in enumerate(seeds):
+        grids[n], dirs[n] = generate_layout(seed, size, n_doors, key_candidates,
+                                            goal_candidates, p_open)
+    return grids, dirs
+
+
+def create_bulk_envs(count, path=None, seed=0, size=10, n_doors=2, key_candidates=None,
+                     goal_candidates=None, workers=None, chunk=512, p_open=0.5):
+    """Generate `count` layouts with seeds `seed … seed+count-1` in a process
+    pool and write them to the corpus file `path`; returns the path."""
+    if path is None:
+        path = f"envs/bulk/DoorKey-{size}x{size}-{count}.npz"
+    seeds = np.arange(seed, seed + count, dtype=np.int64)
+    jobs = [
+        (seeds[i:i + chunk], size, n_doors, key_candidates, goal_candidates, p_open)
+        for i in range(0, count, chunk)
+    ]
+    with ProcessPoolExecutor(workers) as pool:
+        parts = list(pool.map(_generate_chunk, jobs))  # map keeps seed order
+    grids = np.concatenate([g for g, _ in parts]) if parts else np.empty((0, size, size), np.uint8)
+    dirs = np.concatenate([d for _, d in parts]) if parts else np.empty(0, np.uint8)
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    np.savez_compressed(path, grids=grids, dirs=dirs, seeds=seeds)
+    return path
+
+
+def materialize_env(grid, agent_dir):
+    """Build the MiniGrid env of one bulk layout (same object model as
+    `create_known_envs`)."""
+    size = grid.shape[0]
+    env = DoorKeyEnv(size=size, render_mode="rgb_array")
+    env.reset()
+    env.grid = Grid(size, size)
+    for ii in range(size):
+        for jj in range(size):
+            code = grid[ii, jj]
+            if code == WALL:
+                env.grid.set(jj, ii, Wall())
+            elif code == KEY:
+                env.grid.set(jj, ii, Key(color="yellow"))
+            elif code in (DOOR, OPEN_DOOR):
+                opened = code == OPEN_DOOR
+                env.grid.set(jj, ii, Door(color="yellow", is_open=opened, is_locked=not opened))
+            elif code == GOAL:
+                env.grid.set(jj, ii, Goal())
+            elif code == AGENT:
+                env.agent_pos = (jj, ii)
+                env.agent_dir = int(agent_dir)
+    env.gen_obs()
+    return env
+
+
+def export_bulk_envs(path, indices, png=True, pickle_env=True, out_dir=None):
+    """Lazily write PNG previews and/or pickled envs for selected layouts of
+    the corpus at `path` (files are named `<corpus>-<index>.png/.env`)."""
+    corpus = np.load(path)
+    stem = os.path.splitext(os.path.basename(path))[0]
+    out_dir = out_dir or os.path.dirname(path) or "."
+    grids, dirs = corpus["grids"], corpus["dirs"]  # every access re-decompresses
+    for idx in indices:
+        env = materialize_env(grids[idx], dirs[idx])
+        if png:
+            plt.imsave(os.path.join(out_dir, f"{stem}-{idx}.png"), env.render())
+        if pickle_env:
+            with open(os.path.join(out_dir, f"{stem}-{idx}.env"), "wb") as f:
+                pickle.dump(env, f)
+
+
 def main():
     for map_name in known_map_configs.keys():
         create_known_envs(map_name)
     create_random_envs()
 
 
+def _cell(text):
+    """argparse type for a `column,row` cell."""
+    try:
+        c, r = (int(v) for v in text.split(","))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected COLUMN,ROW, got {text!r}")
+    return c, r
+
+
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="Create DoorKey environments")
+    parser.add_argument("--bulk", type=int, metavar="N", help="generate a corpus of N seeded layouts")
+    parser.add_argument("--size", type=int, default=10)
+    parser.add_argument("--doors", type=int, default=2)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--key-cand", type=_cell, nargs="+", default=None, metavar="C,R",
+                        help="restrict the key to these (column, row) cells")
+    parser.add_argument("--goal-cand", type=_cell, nargs="+", default=None, metavar="C,R",
+                        help="restrict the goal to these (column, row) cells")
+    parser.add_argument("--p-open", type=float, default=0.5,
+                        help="probability that a door starts open")
+    parser.add_argument("--out", default=None, help="corpus path (.npz)")
+    parser.add_argument("--preview", type=int, default=0, metavar="K",
+                        help="also write PNG + pickled env for the first K layouts")
+    args = parser.parse_args()
+    if args.bulk is None:
+        main()
+    else:
+        out = create_bulk_envs(args.bulk, args.out, args.seed, args.size, args.doors,
+                               key_candidates=args.key_cand, goal_candidates=args.goal_cand,
+                               workers=args.workers, p_open=args.p_open)
+        export_bulk_envs(out, range(min(args.preview, args.bulk)))
+        print(f"{args.bulk} layouts written to {out}")
 
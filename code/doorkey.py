@@ -1,9 +1,9 @@
+import argparse
+import sys
 from utils import *
-from example import example_use_of_gym_env
-from gymnasium.envs.registration import register
-from minigrid.envs.doorkey import DoorKeyEnv
 from partA import *
 from partB import *
+from profiling import NULL_PROFILER
 
 MF = 0  # Move Forward
 TL = 1  # Turn Left
@@ -13,14 +13,32 @@ UD = 4  # Unlock Door
 
 ACTION_STR = {MF: "MF", TL: "TL", TR: "TR", PK: "PK", UD: "UD"}
 
-class DoorKey10x10Env(DoorKeyEnv):
-    def __init__(self, **kwargs):
-        super().__init__(size=10, **kwargs)
+_DOORKEY_10X10 = None
+
+
+def __getattr__(name):
+    # The random-map pickles reference `__main__:DoorKey10x10Env`.  Defining
+    # the class (and registering the gym id) on first lookup keeps gymnasium
+    # and minigrid out of the import path until an env is actually loaded.
+    global _DOORKEY_10X10
+    if name != "DoorKey10x10Env":
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    if _DOORKEY_10X10 is None:
+        from gymnasium.envs.registration import register
+        from minigrid.envs.doorkey import DoorKeyEnv
+
+        class DoorKey10x10Env(DoorKeyEnv):
+            def __init__(self, **kwargs):
+                super().__init__(size=10, **kwargs)
+
+        DoorKey10x10Env.__qualname__ = "DoorKey10x10Env"  # picklable by name
+        register(
+            id='MiniGrid-DoorKey-10x10-v0',
+            entry_point='__main__:DoorKey10x10Env'
+        )
+        _DOORKEY_10X10 = DoorKey10x10Env
+    return _DOORKEY_10X10
 
-register(
-    id='MiniGrid-DoorKey-10x10-v0',
-    entry_point='__main__:DoorKey10x10Env'
-)
 
 def doorkey_problem(env):
     """
@@ -41,37 +59,94 @@ def doorkey_problem(env):
     return optim_act_seq
 
 
-def partA():
-    env_paths = [
-        "./envs/known_envs/doorkey-5x5-normal.env",
-        "./envs/known_envs/doorkey-6x6-direct.env",
-        "./envs/known_envs/doorkey-6x6-normal.env",
-        "./envs/known_envs/doorkey-6x6-shortcut.env",
-        "./envs/known_envs/doorkey-8x8-direct.env",
-        "./envs/known_envs/doorkey-8x8-normal.env",
-        "./envs/known_envs/doorkey-8x8-shortcut.env",
-    ]
-    for p in env_paths:
-        env, info = load_env(p)
-        seq = plan_once(env, info)
-        total_cost = sum(step_cost(a) for a in seq)
-        print(f"\n{p}: cost={total_cost:.1f}, length={len(seq)}")
-        print(" → ".join(ACTION_STR[a] for a in seq))
-        draw_gif_from_seq(seq, env, path="./gif" + p[len("./envs"):-3] + "gif")
-
-
-def partB():
-    for i in range(1, 37):
-        env_path = f"./envs/random_envs/DoorKey-10x10-{i}.env"
-        env, info = load_all_random_env(env_path)
-        seq = rollout(env, info)
-        total_cost = sum(step_cost(a) for a in seq)
-        print(f"\n{env_path}: cost={total_cost:.1f}, length={len(seq)}")
-        print(" → ".join(ACTION_STR[a] for a in seq))
-        draw_gif_from_seq(seq, env, path="./gif" + env_path[len("./envs"):-3] + "gif")
+KNOWN_ENV_PATHS = [
+    "./envs/known_envs/doorkey-5x5-normal.env",
+    "./envs/known_envs/doorkey-6x6-direct.env",
+    "./envs/known_envs/doorkey-6x6-normal.env",
+    "./envs/known_envs/doorkey-6x6-shortcut.env",
+    "./envs/known_envs/doorkey-8x8-direct.env",
+    "./envs/known_envs/doorkey-8x8-normal.env",
+    "./envs/known_envs/doorkey-8x8-shortcut.env",
+]
+RANDOM_ENV_PATHS = [f"./envs/random_envs/DoorKey-10x10-{i}.env" for i in range(1, 37)]
+
+
+def gif_path(env_path):
+    return "./gif" + env_path[len("./envs"):-3] + "gif"
+
+
+def report(env_path, seq):
+    total_cost = sum(step_cost(a) for a in seq)
+    print(f"\n{env_path}: cost={total_cost:.1f}, length={len(seq)}")
+    print(" → ".join(ACTION_STR[a] for a in seq))
+
+
+def partA(prof=NULL_PROFILER):
+    for p in KNOWN_ENV_PATHS:
+        with prof.map(p):
+            with prof.stage("load"):
+                env, info = load_env(p)
+            with prof.stage("walls"):
+                info = with_walls(env, info)
+            with prof.stage("solve"):
+                policy, _ = backward_dp(info)
+            # execute/render each action as soon as the policy yields it
+            actions = (a for a, _, _ in stream_solved(policy, info))
+            with prof.stage("render"):
+                seq = draw_gif_from_seq(prof.iter("rollout", actions), env, path=gif_path(p))
+        report(p, seq)
+
+
+def partB(prof=NULL_PROFILER):
+    for env_path in RANDOM_ENV_PATHS:
+        with prof.map(env_path):
+            with prof.stage("load"):
+                env, info = load_all_random_env(env_path)
+            with prof.stage("walls"):
+                info = canonical_info(env, info)
+            with prof.stage("solve"):
+                π = scenario_policy(info)  # the first map pays for the 36 solves
+            actions = (a for a, _, _ in stream_scenario(π, info))
+            with prof.stage("render"):
+                seq = draw_gif_from_seq(prof.iter("rollout", actions), env, path=gif_path(env_path))
+        report(env_path, seq)
+
+
+def pipelined(workers=None, depth=8, stats=False):
+    """Run the partA() and partB() batches through :pyclass:`pipeline.Pipeline`
+    (same console output and GIFs, stages overlapped)."""
+    from pipeline import Pipeline
+
+    jobs = [("A", p, gif_path(p)) for p in KNOWN_ENV_PATHS]
+    jobs += [("B", p, gif_path(p)) for p in RANDOM_ENV_PATHS]
+    pipe = Pipeline(planners=workers, depth=depth)
+    pipe.run(jobs, report)
+    if stats:
+        pipe.print_stats(file=sys.stderr)
 
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="DoorKey DP planner")
+    parser.add_argument("--pipeline", action="store_true",
+                        help="overlap loading, planning and rendering of the batch runs")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="planner processes for --pipeline (default: CPU count)")
+    parser.add_argument("--depth", type=int, default=8,
+                        help="maps in flight for --pipeline")
+    parser.add_argument("--stats", action="store_true",
+                        help="print per-stage pipeline counters to stderr")
+    parser.add_argument("--profile", nargs="?", const="profile", metavar="DIR",
+                        help="profile the batch runs per stage; write report.json, "
+                             "stacks.folded and *.pstats to DIR (default: ./profile)")
+    parser.add_argument("--profile-memory", action="store_true",
+                        help="with --profile, also record peak memory per map "
+                             "(tracemalloc; inflates the stage times)")
+    args = parser.parse_args()
+    if args.profile and args.pipeline:
+        parser.error("--profile covers the serial batch runs; drop --pipeline")
+    if args.profile_memory and not args.profile:
+        parser.error("--profile-memory needs --profile")
+
     env_path = "./envs/example-8x8.env"
     env, info = load_env(env_path)
     seq = plan_once(env, info)
@@ -79,6 +154,15 @@ if __name__ == "__main__":
     print(f"\n{env_path}: cost={total_cost:.1f}  len={len(seq)}")
     print(" → ".join(ACTION_STR[a] for a in seq))
     draw_gif_from_seq(seq, env)
-    partA()
-    partB()
+    if args.pipeline:
+        pipelined(args.workers, args.depth, args.stats)
+    elif args.profile:
+        from profiling import Profiler
 
+        prof = Profiler(memory=args.profile_memory)
+        partA(prof)
+        partB(prof)
+        print(f"\nprofile written to {prof.write(args.profile)}", file=sys.stderr)
+    else:
+        partA()
+        partB()
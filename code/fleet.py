@@ -0,0 +1,163 @@
+"""Goal-conditioned cost-to-go fields shared by a fleet on one map.
+
+Every agent on the same DoorKey layout would otherwise pay a full
+:pyfunc:`partA.backward_dp` through :pyfunc:`partA.plan_once`.  A
+:pyclass:`MapService` compiles the map once, solves one cost-to-go field per
+goal cell on demand and keeps the fields in an LRU cache bounded by a memory
+budget.  Answering an agent is then just a walk down the cached field.
+
+:pyfunc:`stochastic.value_iteration` solves the whole compiled model, i.e.
+every door configuration at once, so a field serves every agent heading to
+its goal whatever doors it starts with: one solve per goal.
+"""
+import time
+from collections import OrderedDict
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from compiled import CompiledModel, compile_model
+from partA import *
+from stochastic import SparseModel, value_iteration
+
+
+# ---------------------------------------------------------------------
+# ❶  Distance field
+# ---------------------------------------------------------------------
+
+class DistanceField:
+    """Optimal action and cost-to-go towards one goal over every state of a
+    compiled model.
+
+    Attributes
+    ----------
+    goal  : tuple
+        Goal cell `(x, y)`.
+    PI, V : np.ndarray
+        Action (int8) and cost-to-go (float32) per state index.
+    """
+
+    def __init__(self, model: CompiledModel, goal, PI: np.ndarray, V: np.ndarray):
+        self.goal = to_tuple(goal)
+        self.strides = model.strides
+        self.PI = PI.astype(np.int8)
+        self.V = V.astype(np.float32)
+
+    def _index(self, state: Sequence[int]) -> int:
+        return int(sum(int(v) * int(s) for v, s in zip(state, self.strides)))
+
+    def __getitem__(self, state: Tuple) -> int:
+        return int(self.PI[self._index(state)])
+
+    def __len__(self) -> int:
+        return self.PI.size
+
+    def cost_to_go(self, state: Tuple) -> float:
+        return float(self.V[self._index(state)])
+
+    @property
+    def nbytes(self) -> int:
+        return self.PI.nbytes + self.V.nbytes
+
+
+# ---------------------------------------------------------------------
+# ❷  Map service
+# ---------------------------------------------------------------------
+
+class MapService:
+    """Per-map planner with an LRU cache of :pyclass:`DistanceField`.
+
+    Parameters
+    ----------
+    info   : dict
+        Map description including `wall_pos`; `goal_pos` is not needed.
+    budget : int
+        Memory budget of the cached fields in bytes.  The most recently used
+        field is always kept, even if it alone exceeds the budget.
+    T, gamma
+        Horizon and discount, as in :pyfunc:`partA.backward_dp`.
+
+    Counters ``hits``, ``misses`` and ``evictions`` plus ``nbytes`` (cached
+    field memory) are public attributes.
+    """
+
+    def __init__(self, info: dict, budget: int = 64 << 20, T: int = 300, gamma: float = 0.99):
+        self.info = info
+        self.budget = budget
+        self.T, self.gamma = T, gamma
+        self.model = compile_model(info)
+        self.sparse = SparseModel(self.model)
+        self._fields: "OrderedDict[Tuple[int, int], DistanceField]" = OrderedDict()
+        self.hits = self.misses = self.evictions = 0
+        self.nbytes = 0
+
+    def field(self, goal, door_open: Optional[Sequence[int]] = None) -> DistanceField:
+        """Return the (cached) field towards *goal*.
+
+        Every field covers all door configurations; *door_open*, the initial
+        door bits of the asking agent, is only checked against the map.
+        """
+        n_doors = len(self.model.dims) - 4
+        if door_open is not None and len(door_open) != n_doors:
+            raise ValueError(f"Expected {n_doors} door bit(s), got {tuple(door_open)}")
+        goal = to_tuple(goal)
+        hit = self._fields.get(goal)
+        if hit is not None:
+            self.hits += 1
+            self._fields.move_to_end(goal)
+            return hit
+
+        self.misses += 1
+        PI, V = value_iteration(self.sparse, goal, T=self.T, gamma=self.gamma)
+        field = DistanceField(self.model, goal, PI, V)
+        self._fields[goal] = field
+        self.nbytes += field.nbytes
+        while self.nbytes > self.budget and len(self._fields) > 1:
+            _, old = self._fields.popitem(last=False)
+            self.nbytes -= old.nbytes
+            self.evictions += 1
+        return field
+
+    def stream(self, start: Tuple, goal) -> Iterator[Tuple[int, Tuple, float]]:
+        """Yield `(action, next_state, cost)` from *start* to *goal*."""
+        field = self.field(goal, start[4:])
+        info = dict(self.info, goal_pos=np.array(to_tuple(goal)))
+        yield from stream_policy(field, tuple(start), info)
+
+    def plan(self, start: Tuple, goal) -> List[int]:
+        """Optimal action list for one agent."""
+        return [a for a, _, _ in self.stream(start, goal)]
+
+    def stats(self) -> Dict[str, int]:
+        return {"fields": len(self._fields), "hits": self.hits, "misses": self.misses,
+                "evictions": self.evictions, "nbytes": self.nbytes}
+
+
+if __name__ == "__main__":
+    import partB
+
+    rng = np.random.default_rng(0)
+    info = partB.scenario_info((0, 0, 0, 0))
+    t0 = time.perf_counter()
+    service = MapService(info, budget=256 << 10)
+    t_compile = time.perf_counter() - t0
+
+    free = [(x, y) for x in range(partB.SIZE) for y in range(partB.SIZE)
+            if (x, y) not in partB.WALL_POS and (x, y) not in partB.DOOR_POS]
+    goals = [free[i] for i in rng.choice(len(free), 8, replace=False)]
+    key_side = [(x, y) for x, y in free if x < 5]  # the key is always reachable
+    n_agents = 500
+    t0 = time.perf_counter()
+    for _ in range(n_agents):
+        x, y = key_side[rng.integers(len(key_side))]
+        d1, d2 = rng.integers(2, size=2)
+        start = (x, y, int(rng.integers(4)), 0, int(d1), int(d2))
+        service.plan(start, goals[rng.integers(len(goals))])
+    t_fleet = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    backward_dp(dict(info, goal_pos=np.array(goals[0])))
+    t_dp = time.perf_counter() - t0
+    print(f"[fleet] compile {t_compile:.3f}s, {n_agents} agents in {t_fleet:.2f}s "
+          f"({1e3 * t_fleet / n_agents:.2f} ms/agent) vs backward_dp {t_dp:.2f}s/agent")
+    print(f"[fleet] cache: {service.stats()}")
@@ -0,0 +1,233 @@
+"""Fingerprint-indexed library of precomputed map policies.
+
+:pyfunc:`partB.scenario_policy` finds its policy through
+``KEY_CAND.index`` / ``GOAL_CAND.index`` and re-sorts the doors against the
+hard-coded :data:`partB.DOOR_POS`, so it only serves the single 10x10
+family.  A :pyclass:`PolicyLibrary` serves any number of layouts instead:
+
+* :pyfunc:`fingerprint` hashes the canonical map, i.e. its size, wall
+  bitmap, door cells (sorted, so door order is irrelevant), key cell and
+  goal cell.  Door *states* and the agent's pose are left out, because one
+  policy covers every initial door configuration and every start.
+* Every policy lives in its own file ``<root>/<fp[:2]>/<fp>.pkl`` as a
+  :pyclass:`compress.CompressedPolicy`.  A lookup is one hash plus at most
+  one file read, whatever the library size.  Files are read lazily and kept
+  in a bounded LRU.
+* On a miss the map is compiled, solved with
+  :pyfunc:`stochastic.value_iteration`, compressed and written back.
+
+Run ``python library.py CORPUS.npz`` (a corpus from ``create_env.py --bulk``)
+for the build / lookup report.
+"""
+import hashlib
+import os
+import pickle
+import time
+from collections import OrderedDict
+from itertools import product
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from compiled import compile_model
+from compress import CompressedPolicy, compress_policy
+from partA import *
+from stochastic import SparseModel, value_iteration
+
+
+# ---------------------------------------------------------------------
+# ❶  Canonical form + fingerprint
+# ---------------------------------------------------------------------
+
+def canonical(info: dict) -> dict:
+    """Return a copy of *info* whose doors are sorted by cell `(x, y)`, with
+    the `door_open` bits permuted alongside (cf. :pyfunc:`partB.canonical_info`)."""
+    doors = [to_tuple(p) for p in info.get("door_pos", [])]
+    order = sorted(range(len(doors)), key=lambda i: doors[i])
+    info = dict(info)
+    info["door_pos"] = [np.array(doors[i]) for i in order]
+    if "door_open" in info:
+        info["door_open"] = [info["door_open"][i] for i in order]
+    return info
+
+
+def canonical_key(info: dict) -> Tuple:
+    """Hashable description of everything a policy depends on."""
+    return (
+        int(info["width"]), int(info["height"]),
+        tuple(sorted(to_tuple(c) for c in info.get("wall_pos", ()))),
+        tuple(sorted(to_tuple(p) for p in info.get("door_pos", []))),
+        to_tuple(info["key_pos"]), to_tuple(info["goal_pos"]),
+    )
+
+
+def fingerprint(info: dict) -> str:
+    """Hex digest of the canonical map of *info* (which needs `wall_pos`).
+
+    The walls enter as a packed bitmap, so the digest costs
+    O(width · height) and is independent of the wall listing order.
+    """
+    W, H, walls, doors, key, goal = canonical_key(info)
+    bitmap = np.zeros((W, H), dtype=bool)
+    for x, y in walls:
+        if 0 <= x < W and 0 <= y < H:
+            bitmap[x, y] = True
+    h = hashlib.blake2b(digest_size=16)
+    h.update(np.array([W, H, *key, *goal], dtype=np.int32).tobytes())
+    h.update(np.packbits(bitmap).tobytes())
+    h.update(np.array(doors, dtype=np.int32).tobytes())
+    return h.hexdigest()
+
+
+# ---------------------------------------------------------------------
+# ❷  Library
+# ---------------------------------------------------------------------
+
+class PolicyLibrary:
+    """Directory of compressed policies keyed by :pyfunc:`fingerprint`.
+
+    Parameters
+    ----------
+    root     : str
+        Library directory (created on the first write).
+    solve    : bool
+        Solve and store missing maps on demand; otherwise a miss raises
+        ``KeyError``.
+    capacity : int
+        Number of policies kept in memory (LRU).
+    T, gamma
+        Horizon and discount of on-demand solves.
+
+    Counters ``hits`` (in memory), ``loads`` (read from disk) and
+    ``solves`` (misses) are public attributes.
+    """
+
+    def __init__(self, root: str, solve: bool = True, capacity: int = 256,
+                 T: int = 300, gamma: float = 0.99):
+        self.root = root
+        self.solve = solve
+        self.capacity = max(1, capacity)
+        self.T, self.gamma = T, gamma
+        self._cache: "OrderedDict[str, CompressedPolicy]" = OrderedDict()
+        self.hits = self.loads = self.solves = 0
+
+    def path(self, fp: str) -> str:
+        return os.path.join(self.root, fp[:2], fp + ".pkl")
+
+    def __contains__(self, info: dict) -> bool:
+        fp = fingerprint(info)
+        return fp in self._cache or os.path.exists(self.path(fp))
+
+    def _remember(self, fp: str, policy: CompressedPolicy) -> CompressedPolicy:
+        self._cache[fp] = policy
+        if len(self._cache) > self.capacity:
+            self._cache.popitem(last=False)
+        return policy
+
+    def _load(self, fp: str, key: Tuple) -> Optional[CompressedPolicy]:
+        try:
+            with open(self.path(fp), "rb") as f:
+                entry = pickle.load(f)
+        except FileNotFoundError:
+            return None
+        if entry["key"] != key:
+            raise RuntimeError(f"Fingerprint collision on {fp}")
+        return entry["policy"]
+
+    def add(self, info: dict) -> str:
+        """Solve *info* (with `wall_pos`) and store its policy; returns the
+        fingerprint."""
+        info = canonical(info)
+        fp, key = fingerprint(info), canonical_key(info)
+        model = compile_model(info)
+        PI, _ = value_iteration(SparseModel(model), info["goal_pos"], T=self.T, gamma=self.gamma)
+        n_doors = len(model.dims) - 4
+        starts = np.concatenate([model.start_indices(bits)
+                                 for bits in product((0, 1), repeat=n_doors)])
+        policy = compress_policy(dict(zip(model.states, PI.tolist())), model,
+                                 model.reachable(starts))
+        os.makedirs(os.path.dirname(self.path(fp)), exist_ok=True)
+        tmp = self.path(fp) + f".{os.getpid()}.tmp"
+        with open(tmp, "wb") as f:
+            pickle.dump({"key": key, "policy": policy}, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, self.path(fp))  # atomic: concurrent readers never see half a file
+        self._remember(fp, policy)
+        return fp
+
+    def policy(self, info: dict) -> CompressedPolicy:
+        """Policy of *info* (with `wall_pos`) over canonical door order.
+
+        Raises
+        ------
+        KeyError
+            On a miss when the library was opened with ``solve=False``.
+        """
+        info = canonical(info)
+        fp = fingerprint(info)
+        policy = self._cache.get(fp)
+        if policy is not None:
+            self.hits += 1
+            self._cache.move_to_end(fp)
+            return policy
+        policy = self._load(fp, canonical_key(info))
+        if policy is not None:
+            self.loads += 1
+            return self._remember(fp, policy)
+        if not self.solve:
+            raise KeyError(f"No policy for map {fp} in {self.root}")
+        self.solves += 1
+        self.add(info)
+        return self._cache[fp]
+
+    def stream(self, info: dict) -> Iterator[Tuple[int, Tuple, float]]:
+        """Yield `(action, next_state, cost)` from the initial state of *info*."""
+        info = canonical(info)
+        yield from stream_policy(self.policy(info), initial_state(info), info)
+
+    def rollout(self, info: dict) -> List[int]:
+        """Action list from the initial state of *info*."""
+        return [a for a, _, _ in self.stream(info)]
+
+    def stats(self) -> Dict[str, int]:
+        return {"cached": len(self._cache), "hits": self.hits, "loads": self.loads,
+                "solves": self.solves}
+
+
+if __name__ == "__main__":
+    import argparse
+    import tempfile
+
+    from utils import load_corpus
+
+    parser = argparse.ArgumentParser(description="Build and query a policy library")
+    parser.add_argument("corpus", help="bulk corpus (.npz) from create_env.py --bulk")
+    parser.add_argument("--root", default=None, help="library directory (default: temporary)")
+    parser.add_argument("--limit", type=int, default=None, help="use the first N layouts")
+    args = parser.parse_args()
+
+    infos = list(load_corpus(args.corpus))[:args.limit]
+    root = args.root or tempfile.mkdtemp(prefix="policy-library-")
+
+    lib = PolicyLibrary(root)
+    t0 = time.perf_counter()
+    plans = [lib.rollout(info) for info in infos]
+    t_build = time.perf_counter() - t0
+    print(f"[library] {len(infos)} layouts → {lib.solves} solved, "
+          f"{len(infos) - lib.solves} duplicate(s), {t_build:.1f}s ({root})")
+
+    for capacity in (len(infos), 1):  # warm in-memory cache, cold file reads
+        lib = PolicyLibrary(root, solve=False, capacity=capacity)
+        for info in infos:
+            lib.policy(info)
+        t0 = time.perf_counter()
+        for info, plan in zip(infos, plans):
+            if lib.rollout(info) != plan:
+                raise RuntimeError("Library plan differs from the on-demand solve")
+        dt = time.perf_counter() - t0
+        print(f"[library] capacity {capacity:5d}: {1e3 * dt / len(infos):.2f} ms per "
+              f"lookup + rollout, {lib.stats()}")
+
+    t0 = time.perf_counter()
+    for info in infos:
+        fingerprint(canonical(info))
+    print(f"[library] fingerprint: {1e6 * (time.perf_counter() - t0) / len(infos):.0f} µs per map")
@@ -0,0 +1,278 @@
+"""Prioritized multi-agent planning with a space-time reservation table.
+
+Independent :pyfunc:`partA.plan_once` calls let agents on the same map run
+into each other in the doorways.  :pyclass:`PrioritizedPlanner` plans the
+agents one after another in priority order.  Each search runs over
+`(x, y, h, k, doors, t)` and must avoid the cells that higher-priority
+agents occupy at time *t*, which are recorded in a :pyclass:`Reservations`
+table.
+
+Conflicts are
+
+* vertex — two agents in the same cell at the same time,
+* swap   — two agents exchanging cells in one step,
+* parked — entering the goal cell of an agent that has already arrived
+  (agents stay at their goal).
+
+Key and door bits are per agent (every robot carries its own credentials);
+only cell occupancy is shared.  Turning in place doubles as waiting.
+
+Every search is a space-time A* over the shared
+:pyclass:`compiled.CompiledModel` of a :pyclass:`fleet.MapService`.  The
+service's cached cost-to-go fields (undiscounted, so exact static
+distances) serve as the heuristic.  Once *t* passes the last reservation the
+world is static, so later time steps collapse into one layer and every
+search is finite.  An agent that finds no path is promoted to the front of
+the order and the round is replanned (``restarts`` times at most).
+
+Run ``python multiagent.py`` for the throughput report.
+"""
+import heapq
+import time
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from fleet import MapService
+from partA import *
+
+Cell = Tuple[int, int]
+
+
+# ---------------------------------------------------------------------
+# ❶  Reservation table
+# ---------------------------------------------------------------------
+
+class Reservations:
+    """Cells occupied by already planned agents over time.
+
+    Attributes
+    ----------
+    vertex : dict
+        `(x, y, t)` → agent id.
+    parked : dict
+        Goal cell → time from which its agent stays there.
+    last   : dict
+        Cell → last time any planned agent occupies it (``inf`` if parked).
+    horizon : int
+        Last time step with a moving reservation.
+    """
+
+    def __init__(self):
+        self.vertex: Dict[Tuple[int, int, int], int] = {}
+        self.parked: Dict[Cell, int] = {}
+        self.last: Dict[Cell, float] = {}
+        self.horizon = 0
+
+    def add(self, agent: int, cells: Sequence[Cell]) -> None:
+        """Reserve the cell sequence `cells[t]` of *agent*, parked at the end."""
+        for t, (x, y) in enumerate(cells):
+            self.vertex[(x, y, t)] = agent
+            self.last[(x, y)] = max(self.last.get((x, y), 0), t)
+        self.parked[cells[-1]] = len(cells) - 1
+        self.last[cells[-1]] = float("inf")
+        self.horizon = max(self.horizon, len(cells) - 1)
+
+    def free(self, a: Cell, b: Cell, t: int) -> bool:
+        """May an agent move from cell *a* at *t* to cell *b* at *t + 1*?"""
+        if self.parked.get(b, t + 2) <= t + 1:
+            return False
+        if (b[0], b[1], t + 1) in self.vertex:
+            return False
+        other = self.vertex.get((b[0], b[1], t))  # swap with another agent
+        return other is None or a == b or self.vertex.get((a[0], a[1], t + 1)) != other
+
+
+# ---------------------------------------------------------------------
+# ❷  Planner
+# ---------------------------------------------------------------------
+
+class PrioritizedPlanner:
+    """Conflict-free plans for many agents on one map.
+
+    Parameters
+    ----------
+    info     : dict
+        Map description including `wall_pos` (no `goal_pos` needed).
+    service  : MapService, optional
+        Shares the compiled model and heuristic fields across calls; a new
+        undiscounted service is created by default.  A discounted service
+        still gives an admissible (but weaker) heuristic.
+    restarts : int
+        How many times a failed agent may be promoted and the round replanned.
+    """
+
+    def __init__(self, info: dict, service: Optional[MapService] = None, restarts: int = 5):
+        self.info = info
+        self.service = service or MapService(info, gamma=1.0)
+        self.restarts = restarts
+        model = self.service.model
+        self._succ = model.succ.tolist()
+        self._cells = [(int(x), int(y)) for x, y in model.coords[:, :2]]
+        self._cost = model.cost.tolist()
+        self.expanded = 0
+
+    def heuristic(self, start: Tuple, goal: Cell) -> np.ndarray:
+        """Static cost-to-go of every state index (``inf`` outside the start's
+        door configuration)."""
+        model = self.service.model
+        field = self.service.field(goal, start[4:])
+        active = np.all(model.coords[:, 4:] >= np.array(start[4:]), axis=1)
+        h = np.full(model.n, np.inf)
+        h[active] = field.V[active]
+        h[h >= 1e4] = np.inf  # capped: the goal is unreachable from there
+        return h
+
+    def search(self, start: Tuple, goal: Cell, res: Reservations) -> Optional[List[int]]:
+        """Space-time A* for one agent; returns its state-index path (one
+        entry per time step) or ``None``."""
+        goal = to_tuple(goal)
+        h = self.heuristic(start, goal).tolist()
+        succ, cells, cost = self._succ, self._cells, self._cost
+        s0 = self.service.model.index(start)
+        if h[s0] == float("inf"):
+            return None
+        t_static = res.horizon + 1  # from here on only parked cells remain
+
+        parent: Dict[Tuple[int, int], Optional[Tuple[int, int]]] = {(s0, 0): None}
+        best_g = {(s0, 0): 0.0}
+        heap = [(h[s0], 0.0, 0, s0, 0)]
+        tie = 0
+        while heap:
+            _, g, _, i, t = heapq.heappop(heap)
+            if g > best_g[(i, t)]:
+                continue
+            self.expanded += 1
+            if cells[i] == goal and res.last.get(goal, -1) < t:
+                path, node = [], (i, t)
+                while node is not None:
+                    path.append(node[0])
+                    node = parent[node]
+                return path[::-1]
+            for u in range(len(cost)):
+                j = succ[i][u]
+                if j < 0 or h[j] == float("inf") or not res.free(cells[i], cells[j], t):
+                    continue
+                # every layer past the last reservation is the same
+                node = (j, min(t + 1, t_static))
+                g1 = g + cost[u]
+                if g1 < best_g.get(node, float("inf")):
+                    best_g[node], parent[node] = g1, (i, t)
+                    tie += 1
+                    heapq.heappush(heap, (g1 + h[j], g1, tie, j, node[1]))
+        return None
+
+    def plan(self, agents: Sequence[Tuple[Tuple, Cell]],
+             order: Optional[Sequence[int]] = None) -> List[List[int]]:
+        """Plan every `(start_state, goal_cell)` in *agents*.
+
+        Parameters
+        ----------
+        order : sequence of int, optional
+            Priority order (default: longest static distance first).
+
+        Returns
+        -------
+        list[list[int]]
+            Action sequence per agent, in the order of *agents*.
+
+        Raises
+        ------
+        RuntimeError
+            If no conflict-free set of plans is found within ``restarts``.
+        """
+        model = self.service.model
+        if order is None:
+            dist = [self.heuristic(s, g)[model.index(s)] for s, g in agents]
+            order = sorted(range(len(agents)), key=lambda a: -dist[a])
+        order = list(order)
+        for _ in range(self.restarts + 1):
+            res, paths = Reservations(), {}
+            for a in order:
+                start, goal = agents[a]
+                path = self.search(tuple(start), goal, res)
+                if path is None:
+                    order.remove(a)
+                    order.insert(0, a)
+                    break
+                res.add(a, [self._cells[i] for i in path])
+                paths[a] = path
+            else:
+                return [self._actions(paths[a]) for a in range(len(agents))]
+        raise RuntimeError(f"No conflict-free plan for {len(agents)} agents "
+                           f"after {self.restarts} restart(s)")
+
+    def _actions(self, path: List[int]) -> List[int]:
+        return [self._succ[i].index(j) for i, j in zip(path, path[1:])]
+
+
+def occupancy(agents: Sequence[Tuple[Tuple, Cell]], plans: Sequence[List[int]],
+              info: dict) -> List[List[Cell]]:
+    """Cell of every agent at every time step (parked at the end)."""
+    out = []
+    for (state, _), actions in zip(agents, plans):
+        cells = [to_tuple(state[:2])]
+        for a in actions:
+            state, _ = transition(tuple(state), a, info)
+            cells.append(to_tuple(state[:2]))
+        out.append(cells)
+    return out
+
+
+def conflicts(cells: Sequence[List[Cell]]) -> List[Tuple[int, int, int]]:
+    """`(agent_a, agent_b, t)` of every vertex / swap conflict in *cells*
+    (the output of :pyfunc:`occupancy`)."""
+    def at(a, t):
+        return cells[a][min(t, len(cells[a]) - 1)]
+
+    found = []
+    for t in range(max(len(c) for c in cells)):
+        seen: Dict[Cell, int] = {}
+        for a in range(len(cells)):
+            if at(a, t) in seen:
+                found.append((seen[at(a, t)], a, t))
+            seen[at(a, t)] = a
+            for b in range(a if t else 0):
+                if at(a, t) == at(b, t - 1) and at(b, t) == at(a, t - 1) != at(a, t):
+                    found.append((b, a, t))
+    return found
+
+
+if __name__ == "__main__":
+    import partB
+
+    info = partB.scenario_info((0, 0, 0, 0))
+    t0 = time.perf_counter()
+    planner = PrioritizedPlanner(info)
+    t_compile = time.perf_counter() - t0
+
+    rng = np.random.default_rng(0)
+    # nobody starts or parks in a doorway or right in front of one
+    doorways = {(x + dx, y) for x, y in partB.DOOR_POS for dx in (-1, 0, 1)}
+    free = [(x, y) for x in range(partB.SIZE) for y in range(partB.SIZE)
+            if (x, y) not in partB.WALL_POS and (x, y) not in doorways]
+    print(f"[multiagent] compile {t_compile:.3f}s")
+    for n_agents in (5, 10, 20, 25, 30):  # 30 agents fill ¾ of the free cells
+        cells = [free[i] for i in rng.choice(len(free), 2 * n_agents, replace=False)]
+        agents = []
+        for (x, y), goal in zip(cells[:n_agents], cells[n_agents:]):
+            doors = tuple(int(b) for b in rng.integers(2, size=2)) if x < 5 else (1, 1)
+            agents.append(((x, y, int(rng.integers(4)), 0) + doors, goal))
+
+        times = []
+        for _ in range(2):  # cold: heuristic fields solved, warm: all cached
+            planner.expanded = 0
+            t0 = time.perf_counter()
+            plans = planner.plan(agents)
+            times.append(time.perf_counter() - t0)
+        bad = conflicts(occupancy(agents, plans, info))
+        if bad:
+            raise RuntimeError(f"Conflicts in the final plans: {bad[:3]}")
+        solo = [planner.service.plan(s, g) for s, g in agents]
+        n_solo = len(conflicts(occupancy(agents, solo, info)))
+        cost = lambda ps: sum(step_cost(a) for p in ps for a in p)
+        print(f"[multiagent] {n_agents:3d} agents: cold {times[0] * 1e3:6.1f} ms, warm "
+              f"{times[1] * 1e3:6.1f} ms ({n_agents / times[1]:5.0f} agents/s, "
+              f"{planner.expanded:5d} expansions), cost {cost(plans):.1f}; independent "
+              f"plans {cost(solo):.1f} with {n_solo} conflict(s)")
+    print(f"[multiagent] heuristic fields: {planner.service.stats()}")
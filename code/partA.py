@@ -1,5 +1,5 @@
 from utils import *
-from typing import Dict, List, Tuple
+from typing import Dict, Iterator, List, Optional, Tuple
 
 # ---------------------------------------------------------------------
 # Direction tables
@@ -159,7 +159,7 @@ def terminal_cost(state: Tuple, info: dict) -> float:
 # ❺  Backward Dynamic Programming (finite horizon)
 # ---------------------------------------------------------------------
 
-def backward_dp(info: dict, T: int = 200, gamma: float = 0.99):
+def backward_dp(info: dict, T: int = 200, gamma: float = 0.99, slip=None, method: str = "vi"):
     """Compute optimal value V0 and greedy policy pi0.
 
     Parameters
@@ -172,7 +172,18 @@ def backward_dp(info: dict, T: int = 200, gamma: float = 0.99):
     gamma  : float ∈ (0,1]
         Discount factor for *stage costs*.  Because all costs are positive,
         choosing y<1 encourages shorter paths, but y≈1 typically suffices.
+    slip   : dict, optional
+        Outcome distribution per action (see :pymod:`stochastic`).  When
+        given, the problem is solved as a stochastic MDP with the sparse
+        Bellman operator of :pyfunc:`stochastic.backward_dp_stochastic`.
+    method : {"vi", "pi"}
+        Value or policy iteration; only used together with *slip*.
     """
+    if slip is not None:
+        from stochastic import backward_dp_stochastic
+
+        return backward_dp_stochastic(info, slip, T=T, gamma=gamma, method=method)
+
     X = enumerate_state(info)
     V_next: Dict[Tuple, float] = {x: terminal_cost(x, info) for x in X}  # V_T
     PI: Dict[Tuple, int] = {}
@@ -209,41 +220,100 @@ def extract_static_walls(env) -> set:
                 walls.add((j, i))
     return walls
 
-def plan_once(env, info) -> List[int]:
-    """Solve **one** known-map instance and return the optimal action list.
+def initial_state(info: dict) -> Tuple:
+    """Return the logical start state `(x, y, h, 0, door_0_open, …)` of *info*."""
+    ix, iy = info["init_agent_pos"]
+    heading_table = {(1, 0): 0, (0, 1): 1, (-1, 0): 2, (0, -1): 3}
+    ih = heading_table[tuple(int(v) for v in info["init_agent_dir"])]
+    door_bits = len(info.get("door_pos", [])) or 1
+    doors0 = [1 if o else 0 for o in info.get("door_open", [0] * door_bits)]
+    return (int(ix), int(iy), ih, 0, *doors0)
 
-    Workflow:
-        1.  Augment *info* with static walls extracted from `env`.
-        2.  Solve DP → obtain *policy*.
-        3.  Roll out policy from the *true* initial logical state until the
-            goal is reached (or a loop is detected).
+
+def stream_policy(
+    policy, state: Tuple, info: dict, max_steps: Optional[int] = None,
+    loop_msg: str = "Loop detected — horizon T too small?",
+) -> Iterator[Tuple[int, Tuple, float]]:
+    """Lazily roll out *policy* from *state*, one `(action, next_state, cost)`
+    triple per step, until the goal is reached.
+
+    The consumer may interleave execution between steps and cancel early by
+    simply dropping the generator (or calling ``.close()``).
+
+    Loop guard
+    ----------
+    Instead of a `visited` set that grows with the trajectory, the guard keeps
+    a single checkpoint state that is re-anchored at power-of-two step counts
+    (Brent's cycle detection).  A looping deterministic policy is therefore
+    caught within a small multiple of the cycle length using O(1) memory.
+    *max_steps* additionally caps the trajectory length (default: one step per
+    logical state, which no loop-free rollout can exceed).
     """
-    # 1) add wall coordinates for collision checks
+    if max_steps is None:
+        max_steps = len(policy)
+    checkpoint, power, lam = state, 1, 0
+    for _ in range(max_steps):
+        if terminal_cost(state, info) <= 0:
+            return
+        a = policy[state]
+        if a is None:
+            raise RuntimeError(f"No legal action from state {state}")
+        state, cost = transition(state, a, info)
+        yield a, state, cost
+        lam += 1
+        if state == checkpoint:
+            raise RuntimeError(loop_msg)
+        if lam == power:
+            checkpoint, power, lam = state, power * 2, 0
+    if terminal_cost(state, info) > 0:
+        raise RuntimeError(loop_msg)
+
+
+def with_walls(env, info: dict) -> dict:
+    """Return a copy of *info* augmented with the static walls of `env`."""
     info = dict(info)  # shallow copy → safe to edit
     info["wall_pos"] = extract_static_walls(env)
+    return info
+
+
+def stream_plan(env, info) -> Iterator[Tuple[int, Tuple, float]]:
+    """Generator version of :pyfunc:`plan_once`.
+
+    Solves the DP once, then yields `(action, next_state, cost)` per step so
+    the caller can start executing after the first policy lookup.
+    """
+    # 1) add wall coordinates for collision checks
+    info = with_walls(env, info)
 
     # 2) solve DP
     policy, _ = backward_dp(info)
 
-    # 3) logical initial state
-    ix, iy = info["init_agent_pos"]
-    heading_table = {(1, 0): 0, (0, 1): 1, (-1, 0): 2, (0, -1): 3}
-    ih = heading_table[tuple(info["init_agent_dir"])]
-    door_bits = len(info.get("door_pos", [])) or 1
-    doors0 = [1 if o else 0 for o in info.get("door_open", [0] * door_bits)]
-    state = (ix, iy, ih, 0, *doors0)
-
-    # rollout -----------------------------------------------------------
-    seq: List[int] = []
-    visited = set()
-    while terminal_cost(state, info) > 0:
-        if state in visited:
-            raise RuntimeError("Loop detected — horizon T too small?")
-        visited.add(state)
-        a = policy[state]
-        if a is None:
-            raise RuntimeError(f"No legal action from state {state}")
-        seq.append(a)
-        state, _ = transition(state, a, info)
+    # 3) stream the rollout from the *true* initial logical state
+    yield from stream_solved(policy, info)
+
+
+def stream_solved(policy, info: dict) -> Iterator[Tuple[int, Tuple, float]]:
+    """Roll out an already solved *policy* from the initial state of *info*
+    (which must carry `wall_pos`)."""
+    yield from stream_policy(policy, initial_state(info), info)
+
+
+def plan_from_info(info: dict) -> List[int]:
+    """:pyfunc:`plan_once` for an *info* dict that already carries
+    `wall_pos`; needs no `env`, so it can run in a worker process."""
+    policy, _ = backward_dp(info)
+    return [a for a, _, _ in stream_solved(policy, info)]
+
+
+def plan_once(env, info) -> List[int]:
+    """Solve **one** known-map instance and return the optimal action list.
+
+    Workflow:
+        1.  Augment *info* with static walls extracted from `env`.
+        2.  Solve DP → obtain *policy*.
+        3.  Roll out policy from the *true* initial logical state until the
+            goal is reached (or a loop is detected).
 
-    return seq
\ No newline at end of file
+    See :pyfunc:`stream_plan` for the step-by-step variant.
+    """
+    return plan_from_info(with_walls(env, info))
@@ -1,7 +1,6 @@
 from utils import *
 from partA import *
 import itertools, numpy as np
-from functools import lru_cache
 
 # ---------------------------------------------------------------------------
 # Problem constants (dictated by the assignment)
@@ -39,11 +38,52 @@ def _base_info() -> dict:
 # 1)  Offline pre‑computation (cached)
 # ---------------------------------------------------------------------------
 
-@lru_cache(maxsize=1)
-def precompute_policies() -> Dict[Tuple[int, int, int, int], Dict[Tuple, int]]:
+# Every (k_idx, g_idx, d1, d2) combination, in the canonical solve order;
+# d1/d2 are *booleans* indicating whether each door starts open
+SCENARIOS: List[Tuple[int, int, int, int]] = [
+    (k_idx, g_idx, d1, d2)
+    for k_idx in range(len(KEY_CAND))
+    for g_idx in range(len(GOAL_CAND))
+    for d1, d2 in itertools.product((0, 1), repeat=2)
+]
+
+
+def scenario_info(scenario: Tuple[int, int, int, int]) -> dict:
+    """Return the full *info* dictionary of one *(k_idx, g_idx, d1, d2)*
+    scenario (static map plus key/goal/door-state)."""
+    k_idx, g_idx, d1, d2 = scenario
+    info = _base_info()
+    info.update(
+        {
+            "key_pos": np.array(KEY_CAND[k_idx]),
+            "goal_pos": np.array(GOAL_CAND[g_idx]),
+            "door_open": [bool(d1), bool(d2)],
+        }
+    )
+    return info
+
+
+def solve_scenario(scenario: Tuple[int, int, int, int]) -> Dict[Tuple, int]:
+    """Solve the backward DP of a single scenario and return its policy."""
+    π, _ = backward_dp(scenario_info(scenario), T=300, gamma=0.99)
+    return π
+
+
+_POLICIES: Dict[Tuple[int, int, int, int], Dict[Tuple, int]] = {}
+
+
+def precompute_policies(executor=None, log=print) -> Dict[Tuple[int, int, int, int], Dict[Tuple, int]]:
     """Compute and store the optimal policy for **every** of the 36 parameter
     combinations.
 
+    Parameters
+    ----------
+    executor : concurrent.futures.Executor, optional
+        Solve the scenarios through ``executor.map`` (e.g. a process pool)
+        instead of one after another.
+    log : callable
+        Sink for the one-line completion message.
+
     Returns
     -------
     dict
@@ -51,25 +91,16 @@ def precompute_policies() -> Dict[Tuple[int, int, int, int], Dict[Tuple, int]]:
         *policy* itself maps **state tuples** to optimal actions.
 
     The heavy lifting is delegated to :pyfunc:`partA.backward_dp`.
-    The result is cached (LRU) so subsequent calls are O(1).
+    The result is cached so subsequent calls are O(1).
     """
-    policies = {}
-    for k_idx, key_xy in enumerate(KEY_CAND):
-        for g_idx, goal_xy in enumerate(GOAL_CAND):
-            # d1/d2 are *booleans* indicating whether each door starts open
-            for d1, d2 in itertools.product((0, 1), repeat=2):
-                info = _base_info()
-                info.update(
-                    {
-                        "key_pos": np.array(key_xy),
-                        "goal_pos": np.array(goal_xy),
-                        "door_open": [bool(d1), bool(d2)],
-                    }
-                )
-                π, _ = backward_dp(info, T=300, gamma=0.99)
-                policies[(k_idx, g_idx, d1, d2)] = π
-    print("[partB] finished backward DP for 36 scenarios → policies cached")
-    return policies
+    if not _POLICIES:
+        solve = map if executor is None else executor.map
+        # fill a local table first: a failed or interrupted solve must not
+        # leave a partial cache that later calls would take as complete
+        policies = dict(zip(SCENARIOS, solve(solve_scenario, SCENARIOS)))
+        _POLICIES.update(policies)
+        log("[partB] finished backward DP for 36 scenarios → policies cached")
+    return _POLICIES
 
 
 # ---------------------------------------------------------------------------
@@ -90,6 +121,61 @@ def _scenario_from_info(info: dict) -> Tuple[int, int, int, int]:
 # 2)  Online rollout
 # ---------------------------------------------------------------------------
 
+def canonical_info(env, info: dict) -> dict:
+    """Return a copy of *info* with static walls added and the doors sorted
+    into the global :data:`DOOR_POS` order."""
+    # We need walls for legality; extract once here to avoid re‑parsing later
+    info = with_walls(env, info)
+
+    # Ensure door ordering matches the global DOOR_POS list so that the two
+    # booleans (d1, d2) are in consistent order.  The random map loader does
+    # not guarantee this.
+    ordered_pos, ordered_bits = [], []
+    for wanted in DOOR_POS:  # deterministic order
+        idx = next(i for i, p in enumerate(info["door_pos"]) if tuple(p) == wanted)
+        ordered_pos.append(info["door_pos"][idx])
+        ordered_bits.append(info["door_open"][idx])
+    info["door_pos"] = ordered_pos
+    info["door_open"] = ordered_bits
+    return info
+
+
+def scenario_policy(info: dict) -> Dict[Tuple, int]:
+    """Return the pre-computed policy for an :pyfunc:`canonical_info` dict."""
+    return precompute_policies()[_scenario_from_info(info)]
+
+
+# Raised when a scenario policy loops instead of reaching the goal
+LOOP_MSG = "DP horizon too short — policy loops detected"
+
+
+def stream_scenario(π: Dict[Tuple, int], info: dict) -> Iterator[Tuple[int, Tuple, float]]:
+    """Roll out the already resolved scenario policy *π* (see
+    :pyfunc:`scenario_policy`) on a :pyfunc:`canonical_info` dict."""
+    # Initial MDP state (x, y, heading, has_key, door1, door2)
+    yield from stream_policy(π, initial_state(info), info, loop_msg=LOOP_MSG)
+
+
+def _stream_canonical(info: dict) -> Iterator[Tuple[int, Tuple, float]]:
+    yield from stream_scenario(scenario_policy(info), info)
+
+
+def stream_rollout(env, info: dict) -> Iterator[Tuple[int, Tuple, float]]:
+    """Generator version of :pyfunc:`rollout`.
+
+    Yields `(action, next_state, cost)` one step at a time from the
+    pre-computed policy table, so execution in *env* can be interleaved with
+    the policy lookups and abandoned early (close the generator).
+    """
+    yield from _stream_canonical(canonical_info(env, info))
+
+
+def rollout_from_info(info: dict) -> List[int]:
+    """:pyfunc:`rollout` for an *info* dict already prepared by
+    :pyfunc:`canonical_info`."""
+    return [a for a, _, _ in _stream_canonical(info)]
+
+
 def rollout(env, info: dict) -> List[int]:
     """Execute the pre-computed policy starting from the *true* initial state.
 
@@ -107,36 +193,4 @@ def rollout(env, info: dict) -> List[int]:
         Optimal action sequence leading the agent from its spawn to the
         goal.  Each action is one of `MF, TL, TR, PK, UD`.
     """
-    # We need walls for legality; extract once here to avoid re‑parsing later
-    info = dict(info)  # shallow copy so we can mutate safely
-    info["wall_pos"] = extract_static_walls(env)
-
-    # Ensure door ordering matches the global DOOR_POS list so that the two
-    # booleans (d1, d2) are in consistent order.  The random map loader does
-    # not guarantee this.
-    ordered_pos, ordered_bits = [], []
-    for wanted in DOOR_POS:  # deterministic order
-        idx = next(i for i, p in enumerate(info["door_pos"]) if tuple(p) == wanted)
-        ordered_pos.append(info["door_pos"][idx])
-        ordered_bits.append(info["door_open"][idx])
-    info["door_pos"] = ordered_pos
-    info["door_open"] = ordered_bits
-
-    # Retrieve the correct policy dict
-    π = precompute_policies()[_scenario_from_info(info)]
-
-    # Build initial MDP state (x, y, heading, has_key, door1, door2)
-    x0, y0 = info["init_agent_pos"]
-    heading_map = {(1, 0): 0, (0, 1): 1, (-1, 0): 2, (0, -1): 3}
-    h0 = heading_map[tuple(info["init_agent_dir"])]
-    state = (x0, y0, h0, 0, *[int(b) for b in ordered_bits])
-
-    seq, visited = [], set()
-    while terminal_cost(state, info) > 0:
-        if state in visited:
-            raise RuntimeError("DP horizon too short — policy loops detected")
-        visited.add(state)
-        action = π[state]
-        seq.append(action)
-        state, _ = transition(state, action, info)
-    return seq
\ No newline at end of file
+    return rollout_from_info(canonical_info(env, info))
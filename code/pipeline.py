@@ -0,0 +1,238 @@
+"""Pipelined batch runner for the doorkey.py maps.
+
+``doorkey.partA()`` / ``doorkey.partB()`` load, plan and render one map after
+another.  :pyclass:`Pipeline` overlaps those stages instead:
+
+    load    (thread pool)   unpickle the env, extract walls / canonical info
+    plan    (process pool)  backward DP + rollout  (part B: universal table)
+    render  (thread pool)   replay the actions into the GIF
+    report  (caller)        print, strictly in job order
+
+At most ``depth`` maps are in flight at once (bounded producer/consumer), so
+memory stays flat on long batches.  Every stage keeps a :pyclass:`StageStats`
+with its current/peak queue depth and throughput.
+"""
+import os
+import sys
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Callable, Dict, List, Sequence, Tuple
+
+import partA
+import partB
+from utils import draw_gif_from_seq, load_all_random_env, load_env
+
+STAGES = ("load", "plan", "render")
+
+
+# ---------------------------------------------------------------------
+# ❶  Counters
+# ---------------------------------------------------------------------
+
+class StageStats:
+    """Thread-safe counters of one pipeline stage.
+
+    Attributes
+    ----------
+    submitted, completed : int
+        Items handed to / finished by the stage.
+    peak_depth : int
+        Largest number of items queued or running at the same time.
+    busy : float
+        Summed per-item processing time in seconds.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self.submitted = self.completed = self.peak_depth = 0
+        self.busy = 0.0
+        self._first = self._last = None
+        self._lock = threading.Lock()
+
+    @property
+    def depth(self) -> int:
+        """Items currently queued or running."""
+        return self.submitted - self.completed
+
+    @property
+    def throughput(self) -> float:
+        """Completed items per second of stage wall time."""
+        if not self.completed or self._last == self._first:
+            return 0.0
+        return self.completed / (self._last - self._first)
+
+    def enter(self) -> None:
+        with self._lock:
+            self.submitted += 1
+            self.peak_depth = max(self.peak_depth, self.depth)
+            if self._first is None:
+                self._first = time.perf_counter()
+
+    def leave(self, elapsed: float) -> None:
+        with self._lock:
+            self.completed += 1
+            self.busy += elapsed
+            self._last = time.perf_counter()
+
+    def __repr__(self) -> str:
+        return (f"{self.name:<7s} done={self.completed:<4d} depth={self.depth:<3d} "
+                f"peak={self.peak_depth:<3d} busy={self.busy:7.2f}s "
+                f"throughput={self.throughput:7.2f}/s")
+
+
+# ---------------------------------------------------------------------
+# ❷  Stage functions (module level → picklable)
+# ---------------------------------------------------------------------
+
+def _timed(fn, *args):
+    t0 = time.perf_counter()
+    out = fn(*args)
+    return time.perf_counter() - t0, out
+
+
+def _load_known(path: str):
+    env, info = load_env(path)
+    return env, partA.with_walls(env, info)
+
+
+def _load_random(path: str):
+    env, info = load_all_random_env(path)
+    return env, partB.canonical_info(env, info)
+
+
+LOADERS = {"A": _load_known, "B": _load_random}
+
+
+def _then(fut: Future, fn: Callable[..., Future]) -> Future:
+    """Chain *fn* (returning a future) after *fut*, propagating errors."""
+    out = Future()
+
+    def relay(f):
+        if f.exception() is not None:
+            out.set_exception(f.exception())
+        else:
+            out.set_result(f.result())
+
+    def step(f):
+        if f.exception() is not None:
+            out.set_exception(f.exception())
+            return
+        try:
+            fn(f.result()).add_done_callback(relay)
+        except BaseException as exc:
+            out.set_exception(exc)
+
+    fut.add_done_callback(step)
+    return out
+
+
+# ---------------------------------------------------------------------
+# ❸  Pipeline
+# ---------------------------------------------------------------------
+
+class Pipeline:
+    """Bounded load → plan → render pipeline with in-order reporting.
+
+    Parameters
+    ----------
+    loaders   : int
+        Loader threads.
+    planners  : int, optional
+        Planner processes (default: ``os.cpu_count()``).
+    renderers : int
+        Renderer threads.
+    depth     : int
+        Maximum number of maps in flight.
+    """
+
+    def __init__(self, loaders: int = 4, planners: int = None,
+                 renderers: int = 2, depth: int = 8):
+        self.loaders = loaders
+        self.planners = planners or os.cpu_count() or 1
+        self.renderers = renderers
+        self.depth = max(1, depth)
+        self.stats: Dict[str, StageStats] = {s: StageStats(s) for s in STAGES}
+        self._log: List[str] = []
+
+    def _stage(self, name: str, executor, fn, *args) -> Future:
+        stats = self.stats[name]
+        stats.enter()
+        out = Future()
+
+        def done(f):
+            if f.exception() is not None:
+                stats.leave(0.0)
+                out.set_exception(f.exception())
+                return
+            elapsed, result = f.result()
+            stats.leave(elapsed)
+            out.set_result(result)
+
+        executor.submit(_timed, fn, *args).add_done_callback(done)
+        return out
+
+    def _start(self, part: str, env_path: str, gif: str) -> Future:
+        loaded = self._stage("load", self._load_pool, LOADERS[part], env_path)
+
+        def plan(loaded):
+            env, info = loaded
+            if part == "A":
+                seq = self._stage("plan", self._plan_pool, partA.plan_from_info, info)
+            else:  # table lookup only, once the universal table exists
+                seq = _then(self._table, lambda _: self._stage(
+                    "plan", self._load_pool, partB.rollout_from_info, info))
+            return _then(seq, lambda s: self._stage(
+                "render", self._render_pool, draw_gif_from_seq, s, env, gif))
+
+        return _then(loaded, plan)
+
+    def run(self, jobs: Sequence[Tuple[str, str, str]],
+            report: Callable[[str, List[int]], None]) -> Dict[str, StageStats]:
+        """Process *jobs* and call ``report(env_path, seq)`` in job order.
+
+        Parameters
+        ----------
+        jobs   : sequence of (part, env_path, gif_path)
+            *part* is ``"A"`` (known map, solved per map) or ``"B"`` (random
+            map, answered from :pyfunc:`partB.precompute_policies`).
+        report : callable
+            Receives each map's action sequence, in the order of *jobs*.
+        """
+        jobs = list(jobs)
+        with ProcessPoolExecutor(self.planners) as self._plan_pool, \
+                ThreadPoolExecutor(self.loaders) as self._load_pool, \
+                ThreadPoolExecutor(self.renderers) as self._render_pool, \
+                ThreadPoolExecutor(1) as table_pool:
+            # start the workers before any helper thread exists (fork safety)
+            self._plan_pool.submit(int).result()
+            if any(part == "B" for part, _, _ in jobs):
+                # the 36 scenario solves share the planner processes with
+                # the part A maps; the completion message is replayed in order
+                self._table = table_pool.submit(
+                    partB.precompute_policies, self._plan_pool, self._log.append)
+
+            pending = deque()
+            todo = iter(jobs)
+            for job in todo:
+                pending.append((job, self._start(*job)))
+                if len(pending) >= self.depth:
+                    break
+            replayed = False
+            while pending:
+                (part, env_path, _), fut = pending.popleft()
+                seq = fut.result()
+                if part == "B" and not replayed:
+                    for line in self._log:
+                        print(line)
+                    replayed = True
+                report(env_path, seq)
+                nxt = next(todo, None)
+                if nxt is not None:
+                    pending.append((nxt, self._start(*nxt)))
+        return self.stats
+
+    def print_stats(self, file=sys.stdout) -> None:
+        for name in STAGES:
+            print(self.stats[name], file=file)
@@ -0,0 +1,203 @@
+"""Per-stage profiling of the doorkey.py batch runs (``doorkey.py --profile``).
+
+Each map is split into the stages ``load``, ``walls``, ``solve``, ``rollout``
+and ``render``.  Every stage owns one :pyclass:`cProfile.Profile`; stages nest
+exclusively (entering an inner stage pauses the outer one), so a streamed
+rollout consumed inside ``render`` is charged to ``rollout``.  With
+``memory=True`` tracemalloc also records the peak traced memory of every
+map; it hooks every allocation and slows allocation-heavy stages (the
+tuple-building of ``transition`` / ``legal_actions``) far more than the
+others, so it is off by default and stage times are only comparable
+without it.
+
+:pyfunc:`Profiler.write` produces
+
+    report.json     wall time, calls and top functions per stage, plus
+                    per-map stage times and peak memory (``null`` unless
+                    ``memory=True``)
+    stacks.folded   collapsed stacks (``stage;caller;…;function µs``) for
+                    flame-graph tools (flamegraph.pl, speedscope, …)
+    <stage>.pstats  raw cProfile dumps, for ``python -m pstats``
+
+cProfile records caller → callee edges rather than full stacks, so every
+function is attributed to its heaviest caller chain.
+
+When profiling is off, :data:`NULL_PROFILER` hands out a shared no-op
+context manager and returns iterators untouched.
+"""
+import cProfile
+import json
+import os
+import pstats
+import time
+import tracemalloc
+from contextlib import nullcontext
+from typing import Dict, Iterator, List
+
+STAGES = ("load", "walls", "solve", "rollout", "render")
+
+_NULL_CONTEXT = nullcontext()
+
+
+class _NullProfiler:
+    """Stand-in used when profiling is disabled."""
+
+    enabled = False
+
+    def map(self, path):
+        return _NULL_CONTEXT
+
+    def stage(self, name):
+        return _NULL_CONTEXT
+
+    def iter(self, name, iterable):
+        return iterable
+
+
+NULL_PROFILER = _NullProfiler()
+
+
+class _Stage:
+    def __init__(self, prof: "Profiler", name: str):
+        self.prof, self.name = prof, name
+
+    def __enter__(self):
+        self.prof._push(self.name)
+
+    def __exit__(self, *exc):
+        self.prof._pop()
+
+
+class _Map:
+    def __init__(self, prof: "Profiler", path: str):
+        self.prof, self.path = prof, path
+
+    def __enter__(self):
+        self.prof._map = self.path
+        self.prof.maps[self.path] = {"stages": {}, "peak_bytes": None}
+        if self.prof.memory:
+            tracemalloc.reset_peak()
+
+    def __exit__(self, *exc):
+        if self.prof.memory:
+            self.prof.maps[self.path]["peak_bytes"] = tracemalloc.get_traced_memory()[1]
+        self.prof._map = None
+
+
+class Profiler:
+    """Collects cProfile stats per stage and, with *memory*, peak memory
+    per map."""
+
+    enabled = True
+
+    def __init__(self, memory: bool = False):
+        self.profiles: Dict[str, cProfile.Profile] = {s: cProfile.Profile() for s in STAGES}
+        self.wall: Dict[str, float] = {s: 0.0 for s in STAGES}
+        self.calls: Dict[str, int] = {s: 0 for s in STAGES}
+        self.maps: Dict[str, dict] = {}
+        self._stack: List[List] = []  # [stage name, resume time]
+        self._map = None
+        self.memory = memory
+        self._started_tracing = memory and not tracemalloc.is_tracing()
+        if self._started_tracing:
+            tracemalloc.start()
+
+    # -- stage bookkeeping ---------------------------------------------
+    def _charge(self, name: str, start: float) -> None:
+        dt = time.perf_counter() - start
+        self.wall[name] += dt
+        if self._map is not None:
+            per_map = self.maps[self._map]["stages"]
+            per_map[name] = per_map.get(name, 0.0) + dt
+
+    def _push(self, name: str) -> None:
+        if self._stack:  # pause the enclosing stage
+            outer = self._stack[-1]
+            self.profiles[outer[0]].disable()
+            self._charge(outer[0], outer[1])
+        self.calls[name] += 1
+        self._stack.append([name, time.perf_counter()])
+        self.profiles[name].enable()
+
+    def _pop(self) -> None:
+        name, start = self._stack.pop()
+        self.profiles[name].disable()
+        self._charge(name, start)
+        if self._stack:  # resume the enclosing stage
+            self._stack[-1][1] = time.perf_counter()
+            self.profiles[self._stack[-1][0]].enable()
+
+    def map(self, path: str) -> _Map:
+        """Context manager delimiting one map (peak memory, per-map times)."""
+        return _Map(self, path)
+
+    def stage(self, name: str) -> _Stage:
+        """Context manager charging the enclosed work to stage *name*."""
+        return _Stage(self, name)
+
+    def iter(self, name: str, iterable) -> Iterator:
+        """Wrap *iterable* so that producing each item is charged to *name*."""
+        it = iter(iterable)
+        while True:
+            with self.stage(name):
+                try:
+                    item = next(it)
+                except StopIteration:
+                    return
+            yield item
+
+    # -- output ----------------------------------------------------------
+    def _stats(self, name: str):
+        prof = self.profiles[name]
+        prof.create_stats()
+        return pstats.Stats(prof) if prof.stats else None
+
+    def write(self, out_dir: str = "profile", top: int = 25) -> str:
+        """Write report.json, stacks.folded and per-stage .pstats to *out_dir*."""
+        if self._started_tracing:
+            tracemalloc.stop()
+            self._started_tracing = False
+        os.makedirs(out_dir, exist_ok=True)
+        report = {"stages": {}, "maps": self.maps}
+        folded = []
+        for name in STAGES:
+            stats = self._stats(name)
+            entry = {"wall_s": self.wall[name], "calls": self.calls[name], "top": []}
+            report["stages"][name] = entry
+            if stats is None:
+                continue
+            stats.dump_stats(os.path.join(out_dir, f"{name}.pstats"))
+            rows = sorted(stats.stats.items(), key=lambda kv: kv[1][2], reverse=True)
+            for func, (cc, nc, tt, ct, _) in rows[:top]:
+                entry["top"].append({"function": _label(func), "ncalls": nc,
+                                     "tottime": tt, "cumtime": ct})
+            for func, (_, _, tt, _, _) in rows:
+                if tt > 0:
+                    chain = ";".join(_label(f) for f in _heaviest_chain(stats.stats, func))
+                    folded.append(f"{name};{chain} {max(1, int(tt * 1e6))}")
+        with open(os.path.join(out_dir, "report.json"), "w") as f:
+            json.dump(report, f, indent=2)
+        with open(os.path.join(out_dir, "stacks.folded"), "w") as f:
+            f.write("\n".join(folded) + "\n")
+        return out_dir
+
+
+def _label(func) -> str:
+    filename, line, name = func
+    if filename == "~":  # built-in
+        return name.replace(";", ",")
+    return f"{name} ({os.path.basename(filename)}:{line})"
+
+
+def _heaviest_chain(stats: dict, func) -> list:
+    """Root → *func* call chain following the costliest caller edges."""
+    chain, seen = [func], {func}
+    while True:
+        callers = stats[chain[0]][4]
+        if not callers:
+            return chain
+        parent = max(callers, key=lambda c: callers[c][3])
+        if parent in seen or parent not in stats:
+            return chain
+        chain.insert(0, parent)
+        seen.add(parent)
@@ -0,0 +1,247 @@
+"""Irrelevant-dimension elimination and scenario deduplication for partB.
+
+Two observations shrink the universal table of :pyfunc:`partB.precompute_policies`:
+
+1.  The compiled transitions depend on the key cell only (walls and doors
+    are shared), and the backward DP solves *every* door configuration at
+    once — the initial door state only selects the start state.  The 36
+    scenarios therefore need just ``len(KEY_CAND) · len(GOAL_CAND)`` solves
+    over ``len(KEY_CAND)`` compiled models.
+
+2.  Within one scenario only states reachable from a free start cell with
+    its initial doors are ever queried.  Along some state components the
+    optimal action does not change over those states (a door that starts
+    open stays open, the key bit is moot once the goal-side door is open,
+    …).  Such components are projected out, and scenarios whose projected
+    tables agree wherever both are defined share one stored table.
+
+Lookups are exact against :pyfunc:`partB.precompute_policies` on every
+reachable state (checked by :pyfunc:`verify`).  Run ``python reduction.py``
+for the solve-time / size report.
+"""
+import time
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+import partB
+from compiled import CompiledModel, compile_model
+from stochastic import SparseModel, value_iteration
+
+# Marker for "no reachable state maps here" in a reduced table
+DONT_CARE = 255
+
+
+# ---------------------------------------------------------------------
+# ❶  Reduced policy tables
+# ---------------------------------------------------------------------
+
+class ReducedPolicy:
+    """Dense action table over the *kept* state components of one scenario.
+
+    Attributes
+    ----------
+    keep    : tuple[int]
+        Positions of the state components the action depends on.
+    strides : tuple[int]
+        Index stride of each kept component.
+    table   : bytes
+        Action per reduced index (:data:`DONT_CARE` where unconstrained;
+        looking such a state up raises ``KeyError``).
+    n       : int
+        Number of logical states of the full model.
+    """
+
+    def __init__(self, keep, strides, table, n: int):
+        self.keep = tuple(keep)
+        self.strides = tuple(int(s) for s in strides)
+        self.table = bytes(table)
+        self.n = n
+
+    def __getitem__(self, state: Tuple) -> int:
+        a = self.table[sum(state[d] * s for d, s in zip(self.keep, self.strides))]
+        if a == DONT_CARE:
+            raise KeyError(f"State {state} is outside the reachable set of this table")
+        return a
+
+    def __len__(self) -> int:
+        return self.n
+
+    @property
+    def nbytes(self) -> int:
+        return len(self.table) + 4 * (len(self.keep) + len(self.strides))
+
+
+class ReducedUniversalPolicy:
+    """Scenario → policy mapping backed by deduplicated reduced tables.
+
+    ``aliases[scenario]`` is the position of the scenario's table in
+    ``tables``; indexing with a scenario returns that :pyclass:`ReducedPolicy`,
+    so the object is a drop-in for the dict of
+    :pyfunc:`partB.precompute_policies`.
+    """
+
+    def __init__(self, tables: List[ReducedPolicy], aliases: Dict[Tuple, int]):
+        self.tables = tables
+        self.aliases = aliases
+
+    def __getitem__(self, scenario: Tuple[int, int, int, int]) -> ReducedPolicy:
+        return self.tables[self.aliases[scenario]]
+
+    def __iter__(self):
+        return iter(self.aliases)
+
+    def __len__(self) -> int:
+        return len(self.aliases)
+
+    @property
+    def nbytes(self) -> int:
+        return sum(t.nbytes for t in self.tables) + len(self.aliases)
+
+
+# ---------------------------------------------------------------------
+# ❷  Analysis
+# ---------------------------------------------------------------------
+
+def _nd(model: CompiledModel, values: np.ndarray, fill) -> np.ndarray:
+    """Scatter a per-index vector onto one array axis per state component."""
+    out = np.full(model.dims, fill, dtype=values.dtype)
+    out[tuple(model.coords.T)] = values
+    return out
+
+
+def project(table: np.ndarray, care: np.ndarray):
+    """Project out every state component the cared-for actions don't depend on.
+
+    Returns `(keep, table, care)` where the arrays only have the kept axes.
+    A component is dropped when, along each of its fibres, all cared-for
+    entries carry the same action; components are tested one after another
+    on the already-projected table, so combined projections stay exact.
+    """
+    keep = list(range(table.ndim))
+    axis = 0
+    while axis < table.ndim:
+        hi = np.where(care, table, -1).max(axis=axis)
+        lo = np.where(care, table, 256).min(axis=axis)
+        any_care = care.any(axis=axis)
+        if np.all(~any_care | (hi == lo)):
+            table = np.where(any_care, hi, DONT_CARE).astype(np.int16)
+            care = any_care
+            del keep[axis]
+        else:
+            axis += 1
+    return keep, table, care
+
+
+def _merge(a, b) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+    """Merge two reduced `(table, care)` pairs if they agree where both care."""
+    (ta, ca), (tb, cb) = a, b
+    if ta.shape != tb.shape or np.any(ca & cb & (ta != tb)):
+        return None
+    return np.where(ca, ta, tb), ca | cb
+
+
+# ---------------------------------------------------------------------
+# ❸  Solve + reduce
+# ---------------------------------------------------------------------
+
+def solve_dense(T: int = 300, gamma: float = 0.99):
+    """Solve the universal table with one compiled model per key cell and
+    one value iteration per (key, goal).
+
+    Returns
+    -------
+    models : dict  k_idx → CompiledModel
+    PI     : dict  (k_idx, g_idx) → np.ndarray of actions per state index
+    """
+    models, PI = {}, {}
+    for k_idx in range(len(partB.KEY_CAND)):
+        models[k_idx] = compile_model(partB.scenario_info((k_idx, 0, 0, 0)))
+        sparse = SparseModel(models[k_idx])
+        for g_idx, goal in enumerate(partB.GOAL_CAND):
+            PI[(k_idx, g_idx)], _ = value_iteration(sparse, goal, T=T, gamma=gamma)
+    return models, PI
+
+
+def reduce_universal(T: int = 300, gamma: float = 0.99) -> ReducedUniversalPolicy:
+    """Build the deduplicated, dimension-reduced universal policy."""
+    models, PI = solve_dense(T, gamma)
+    groups: List[Tuple[Tuple[int, ...], Tuple[np.ndarray, np.ndarray]]] = []
+    aliases = {}
+    for scenario in partB.SCENARIOS:
+        k_idx, g_idx, d1, d2 = scenario
+        model = models[k_idx]
+        care = model.reachable(model.start_indices((d1, d2)))
+        keep, table, care_r = project(
+            _nd(model, PI[(k_idx, g_idx)].astype(np.int16), DONT_CARE),
+            _nd(model, care, False),
+        )
+        for gid, (g_keep, pair) in enumerate(groups):
+            merged = _merge(pair, (table, care_r)) if g_keep == tuple(keep) else None
+            if merged is not None:
+                groups[gid] = (g_keep, merged)
+                aliases[scenario] = gid
+                break
+        else:
+            aliases[scenario] = len(groups)
+            groups.append((tuple(keep), (table, care_r)))
+
+    n = next(iter(models.values())).n
+    dims = next(iter(models.values())).dims
+    tables = []
+    for keep, (table, care) in groups:
+        sizes = [dims[d] for d in keep]
+        strides = np.cumprod([1] + sizes[::-1])[:-1][::-1] if sizes else []
+        flat = np.where(care, table, DONT_CARE).astype(np.uint8).ravel()
+        tables.append(ReducedPolicy(keep, strides, flat, n))
+    return ReducedUniversalPolicy(tables, aliases)
+
+
+def verify(reduced: ReducedUniversalPolicy, policies) -> int:
+    """Check *reduced* against the dict *policies* on every reachable state
+    of every scenario; returns the number of states checked.
+
+    Raises
+    ------
+    RuntimeError
+        On the first disagreeing state.
+    """
+    checked = 0
+    models: Dict[int, CompiledModel] = {}
+    for scenario in partB.SCENARIOS:
+        k_idx, _, d1, d2 = scenario
+        if k_idx not in models:
+            models[k_idx] = compile_model(partB.scenario_info(scenario))
+        model = models[k_idx]
+        care = model.reachable(model.start_indices((d1, d2)))
+        pol, red = policies[scenario], reduced[scenario]
+        for x in (model.states[i] for i in np.flatnonzero(care)):
+            if red[x] != pol[x]:
+                raise RuntimeError(f"Scenario {scenario}: state {x} → {red[x]}, expected {pol[x]}")
+            checked += 1
+    return checked
+
+
+if __name__ == "__main__":
+    import pickle
+
+    t0 = time.perf_counter()
+    policies = partB.precompute_policies()
+    t_full = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    reduced = reduce_universal()
+    t_red = time.perf_counter() - t0
+    n_checked = verify(reduced, policies)
+
+    full_bytes = sum(len(pickle.dumps(p)) for p in policies.values())
+    dense_bytes = sum(len(p) for p in policies.values())
+    print(f"[reduction] exact on {n_checked} reachable (scenario, state) pairs")
+    print(f"solve time   : precompute_policies {t_full:6.2f}s → reduced {t_red:6.2f}s")
+    print(f"stored tables: {len(policies)} → {len(reduced.tables)}")
+    for gid, t in enumerate(reduced.tables):
+        names = ["x", "y", "h", "k", "d1", "d2"]
+        members = sum(1 for a in reduced.aliases.values() if a == gid)
+        print(f"  table {gid:2d}: keeps ({', '.join(names[d] for d in t.keep)}), "
+              f"{len(t.table):5d} entries, {members} scenario(s)")
+    print(f"stored size  : pickled dicts {full_bytes:,d} B, dense uint8 {dense_bytes:,d} B "
+          f"→ reduced {reduced.nbytes:,d} B")
@@ -0,0 +1,268 @@
+"""Stochastic ("slip") transitions and sparse Bellman solvers.
+
+Real robots sometimes fail to move forward or turn too far.  A *slip model*
+gives every commanded action a distribution over outcomes:
+
+    slip = {MF: [(0.9, (MF,)), (0.1, ())],          # 10 % stall
+            TL: [(0.95, (TL,)), (0.05, (TL, TL))],  # 5 % over-turn
+            …}
+
+Each outcome is a sequence of primitive moves that is executed until the
+first one that is illegal in the intermediate state (so a double step into a
+wall ends after the first step).  Actions missing from *slip* are
+deterministic.  The commanded action must be legal, and its stage cost is
+charged whatever the outcome.
+
+Over the compiled state space (:pymod:`compiled`) the model becomes a CSR
+matrix with one row per legal (state, action) pair, and the Bellman backup a
+sparse matrix–vector product:
+
+    Q[row] = cost[action(row)] + γ · Σ_k data[k] · V[indices[k]],
+             k ∈ [indptr[row], indptr[row+1])
+
+:pyfunc:`value_iteration` and :pyfunc:`policy_iteration` both return the
+`(PI, V)` pair of :pyfunc:`partA.backward_dp`.
+"""
+import time
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from compiled import N_ACTIONS, CompiledModel, compile_model
+from partA import *
+
+# Outcome distribution per action: [(probability, primitive moves), …]
+SlipModel = Dict[int, List[Tuple[float, Tuple[int, ...]]]]
+
+# Tie-breaking order of partA.legal_actions (first minimum wins)
+ACTION_ORDER = np.array([TL, TR, MF, PK, UD])
+
+
+def slip_model(p_stall: float = 0.1, p_overturn: float = 0.05) -> SlipModel:
+    """Forward moves stall with probability *p_stall*; turns rotate twice
+    with probability *p_overturn*."""
+    return {
+        MF: [(1.0 - p_stall, (MF,)), (p_stall, ())],
+        TL: [(1.0 - p_overturn, (TL,)), (p_overturn, (TL, TL))],
+        TR: [(1.0 - p_overturn, (TR,)), (p_overturn, (TR, TR))],
+    }
+
+
+def _outcomes(slip: SlipModel, u: int) -> List[Tuple[float, Tuple[int, ...]]]:
+    outcomes = slip.get(u, [(1.0, (u,))])
+    total = sum(p for p, _ in outcomes)
+    if abs(total - 1.0) > 1e-9 or any(p < 0 for p, _ in outcomes):
+        raise ValueError(f"Outcome probabilities of action {u} sum to {total}, expected 1")
+    return outcomes
+
+
+# ---------------------------------------------------------------------
+# ❶  CSR transition model
+# ---------------------------------------------------------------------
+
+class SparseModel:
+    """CSR form of a slip model over a :pyclass:`compiled.CompiledModel`.
+
+    Attributes
+    ----------
+    row_state, row_action : np.ndarray
+        State index and action of every row (legal pairs only).
+    indptr, indices, data : np.ndarray
+        CSR successor indices and probabilities of every row.
+    row_of : np.ndarray, shape (n, 5)
+        Row of each (state, action), ``-1`` where illegal.
+    """
+
+    def __init__(self, model: CompiledModel, slip: Optional[SlipModel] = None):
+        slip = slip or {}
+        self.model = model
+        n = model.n
+        rows, cols, probs = [], [], []
+        for u in range(N_ACTIONS):
+            legal = np.flatnonzero(model.succ[:, u] >= 0)
+            for p, prims in _outcomes(slip, u):
+                if p == 0.0:
+                    continue
+                cur, alive = legal.copy(), np.ones(legal.size, dtype=bool)
+                for v in prims:
+                    nxt = model.succ[cur, v]
+                    ok = alive & (nxt >= 0)
+                    cur = np.where(ok, nxt, cur)
+                    alive &= ok
+                rows.append(legal * N_ACTIONS + u)
+                cols.append(cur)
+                probs.append(np.full(legal.size, p))
+        rows, cols, probs = map(np.concatenate, (rows, cols, probs))
+
+        # merge outcomes that land in the same state, then sort row-major
+        key = rows.astype(np.int64) * n + cols
+        key, inverse = np.unique(key, return_inverse=True)
+        data = np.bincount(inverse, weights=probs)
+        pair, self.indices = np.divmod(key, n)
+        pair_ids, starts = np.unique(pair, return_index=True)
+        self.row_state, self.row_action = np.divmod(pair_ids, N_ACTIONS)
+        self.indptr = np.append(starts, key.size)
+        self.data = data
+        self.row_cost = model.cost[self.row_action]
+        self.row_of = np.full((n, N_ACTIONS), -1, dtype=np.int64)
+        self.row_of[self.row_state, self.row_action] = np.arange(pair_ids.size)
+
+    @property
+    def nnz(self) -> int:
+        return self.data.size
+
+    def q_values(self, V: np.ndarray, gamma: float) -> np.ndarray:
+        """Bellman backup of every row: one CSR matrix–vector product."""
+        ev = np.add.reduceat(self.data * V[self.indices], self.indptr[:-1])
+        return self.row_cost + gamma * ev
+
+    def policy_rows(self, rows: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """CSR `(indptr, indices, data)` restricted to *rows* (one per state)."""
+        lengths = self.indptr[rows + 1] - self.indptr[rows]
+        indptr = np.append(0, np.cumsum(lengths))
+        k = np.repeat(self.indptr[rows] - indptr[:-1], lengths) + np.arange(indptr[-1])
+        return indptr, self.indices[k], self.data[k]
+
+    def greedy(self, V: np.ndarray, gamma: float) -> Tuple[np.ndarray, np.ndarray]:
+        """Return `(best_q, best_u)` per state (ties → partA action order)."""
+        Q = np.full((self.model.n, N_ACTIONS), np.inf)
+        Q[self.row_state, self.row_action] = self.q_values(V, gamma)
+        best_u = ACTION_ORDER[np.argmin(Q[:, ACTION_ORDER], axis=1)]
+        return Q[np.arange(self.model.n), best_u], best_u
+
+
+# ---------------------------------------------------------------------
+# ❷  Solvers
+# ---------------------------------------------------------------------
+
+def _as_dicts(model: CompiledModel, PI: np.ndarray, V: np.ndarray):
+    return (
+        {x: int(u) for x, u in zip(model.states, PI)},
+        {x: float(v) for x, v in zip(model.states, V)},
+    )
+
+
+def value_iteration(sparse: SparseModel, goal, T: int = 200, gamma: float = 0.99,
+                    tol: float = 1e-6) -> Tuple[np.ndarray, np.ndarray]:
+    """Finite-horizon value iteration with early stopping; array form of
+    :pyfunc:`partA.backward_dp` (identical result for a deterministic model).
+
+    Returns
+    -------
+    (PI, V) : np.ndarray
+        Greedy action and cost-to-go per state index.
+    """
+    term = sparse.model.terminal(goal)
+    V_next = term.copy()
+    PI = np.zeros(sparse.model.n, dtype=np.int64)
+    for _ in range(T):
+        best_q, PI = sparse.greedy(V_next, gamma)
+        V_curr = np.minimum(best_q, term)
+        if np.all(np.abs(V_curr - V_next) < tol):
+            break
+        V_next = V_curr
+    return PI, V_next
+
+
+def policy_iteration(sparse: SparseModel, goal, T: int = 200, gamma: float = 0.99,
+                     tol: float = 1e-6, max_iter: int = 100) -> Tuple[np.ndarray, np.ndarray]:
+    """Policy iteration with iterative (sparse) policy evaluation.
+
+    Stopping at a state is an extra choice worth its terminal cost, exactly
+    like the `min(best_q, terminal_cost)` of :pyfunc:`partA.backward_dp`.
+    """
+    n = sparse.model.n
+    term = sparse.model.terminal(goal)
+    best_q, PI = sparse.greedy(term, gamma)
+    stop = term <= best_q
+    V = np.where(stop, term, best_q)
+    for _ in range(max_iter):
+        # -- evaluation: V = c_π + γ P_π V on non-stopping states
+        rows = sparse.row_of[np.arange(n), PI]
+        indptr, indices, data = sparse.policy_rows(rows)
+        cost = sparse.row_cost[rows]
+        for _ in range(T):
+            q = cost + gamma * np.add.reduceat(data * V[indices], indptr[:-1])
+            V_new = np.where(stop, term, q)
+            done = np.all(np.abs(V_new - V) < tol)
+            V = V_new
+            if done:
+                break
+        # -- improvement
+        best_q, new_PI = sparse.greedy(V, gamma)
+        new_stop = term <= best_q
+        # keep the current action unless strictly improved (avoids cycling)
+        cur_q = np.where(stop, term, sparse.q_values(V, gamma)[rows])
+        improve = np.minimum(best_q, term) < cur_q - tol
+        if not improve.any():
+            break
+        PI = np.where(improve, new_PI, PI)
+        stop = np.where(improve, new_stop, stop)
+    _, PI_greedy = sparse.greedy(V, gamma)
+    return PI_greedy, V
+
+
+def backward_dp_stochastic(info: dict, slip: Optional[SlipModel] = None, T: int = 200,
+                           gamma: float = 0.99, method: str = "vi"):
+    """Solve *info* under *slip*; returns the `(PI, V)` dicts of
+    :pyfunc:`partA.backward_dp`.
+
+    Parameters
+    ----------
+    method : {"vi", "pi"}
+        Value iteration or policy iteration.
+    """
+    solvers = {"vi": value_iteration, "pi": policy_iteration}
+    if method not in solvers:
+        raise ValueError(f"Unknown method {method!r}; expected one of {sorted(solvers)}")
+    model = compile_model(info)
+    PI, V = solvers[method](SparseModel(model, slip), info["goal_pos"], T=T, gamma=gamma)
+    return _as_dicts(model, PI, V)
+
+
+# ---------------------------------------------------------------------
+# ❸  Simulation
+# ---------------------------------------------------------------------
+
+def sample_transition(state: Tuple, action: int, info: dict, slip: SlipModel, rng):
+    """Draw one outcome of *action* under *slip*; returns `(next_state, cost)`."""
+    outcomes = _outcomes(slip, action)
+    _, prims = outcomes[rng.choice(len(outcomes), p=[p for p, _ in outcomes])]
+    nxt = state
+    for v in prims:
+        if v not in legal_actions(nxt, info):
+            break
+        nxt, _ = transition(nxt, v, info)
+    return nxt, step_cost(action)
+
+
+def simulate(policy, state: Tuple, info: dict, slip: SlipModel, rng=None,
+             max_steps: int = 1000) -> Iterator[Tuple[int, Tuple, float]]:
+    """Stochastic counterpart of :pyfunc:`partA.stream_policy`: yields
+    `(action, next_state, cost)` with sampled outcomes until the goal is
+    reached or *max_steps* have been taken."""
+    rng = np.random.default_rng() if rng is None else rng
+    for _ in range(max_steps):
+        if terminal_cost(state, info) <= 0:
+            return
+        a = policy[state]
+        state, cost = sample_transition(state, a, info, slip, rng)
+        yield a, state, cost
+
+
+if __name__ == "__main__":
+    import partB
+
+    slip = slip_model()
+    for method in ("vi", "pi"):
+        t0 = time.perf_counter()
+        nnz = 0
+        for scenario in partB.SCENARIOS:
+            info = partB.scenario_info(scenario)
+            sparse = SparseModel(compile_model(info), slip)
+            nnz += sparse.nnz
+            solver = value_iteration if method == "vi" else policy_iteration
+            solver(sparse, info["goal_pos"], T=300)
+        dt = time.perf_counter() - t0
+        print(f"[stochastic] {method}: 36 scenarios (10x10, slip) in {dt:.2f}s, "
+              f"{nnz / 36:.0f} nonzeros per scenario")
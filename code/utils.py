@@ -1,11 +1,11 @@
 import os
 import numpy as np
-import gymnasium as gym
 import pickle
-import matplotlib.pyplot as plt
-import imageio
 import random
-from minigrid.core.world_object import Goal, Key, Door
+
+# gymnasium, minigrid, matplotlib and imageio are imported inside the
+# functions that need them, so the planning modules (partA, partB, …) that
+# `from utils import *` only pay for NumPy at import time.
 
 MF = 0  # Move Forward
 TL = 1  # Turn Left
@@ -64,6 +64,8 @@ def generate_random_env(seed, task):
         'MiniGrid-DoorKey-6x6-v0'
         'MiniGrid-DoorKey-8x8-v0'
     """
+    import gymnasium as gym
+
     if seed < 0:
         seed = np.random.randint(50)
     env = gym.make(task, render_mode="rgb_array")
@@ -78,6 +80,8 @@ def load_env(path):
     Returns:
         gym-environment, info
     """
+    from minigrid.core.world_object import Goal, Key, Door
+
     with open(path, "rb") as f:
         env = pickle.load(f)
 
@@ -111,6 +115,8 @@ def load_random_env(env_folder):
     Returns:
         gym-environment, info
     """
+    from minigrid.core.world_object import Goal, Key, Door
+
     env_list = [os.path.join(env_folder, env_file) for env_file in os.listdir(env_folder) if env_file.endswith(".env")]
     env_path = random.choice(env_list)
     with open(env_path, "rb") as f:
@@ -147,6 +153,8 @@ def load_all_random_env(path):
     Returns:
         gym-environment, info
     """
+    from minigrid.core.world_object import Goal, Key, Door
+
     with open(path, "rb") as f:
         env = pickle.load(f)
 
@@ -174,6 +182,40 @@ def load_all_random_env(path):
 
     return env, info
 
+def load_corpus(path):
+    """
+    Load a bulk corpus written by create_env.create_bulk_envs
+    ---------------------------------------------
+    Yields:
+        info (with "wall_pos"), one per layout; no gym env is built
+    """
+    corpus = np.load(path)
+    for grid, agent_dir in zip(corpus["grids"], corpus["dirs"]):
+        height, width = grid.shape
+        ys, xs = np.nonzero(grid == 3)  # AGENT
+        info = {
+            "height": height,
+            "width": width,
+            "init_agent_pos": (int(xs[0]), int(ys[0])),
+            "init_agent_dir": np.array([(1, 0), (0, 1), (-1, 0), (0, -1)][agent_dir]),
+            "door_pos": [],
+            "door_open": [],
+            "wall_pos": set(),
+        }
+        for i in range(height):
+            for j in range(width):
+                code = grid[i, j]
+                if code == 0:  # WALL
+                    info["wall_pos"].add((j, i))
+                elif code == 2:  # KEY
+                    info["key_pos"] = np.array([j, i])
+                elif code in (4, 6):  # DOOR / OPEN_DOOR
+                    info["door_pos"].append(np.array([j, i]))
+                    info["door_open"].append(bool(code == 6))
+                elif code == 5:  # GOAL
+                    info["goal_pos"] = np.array([j, i])
+        yield info
+
 def save_env(env, path):
     with open(path, "wb") as f:
         pickle.dump(env, f)
@@ -184,6 +226,8 @@ def plot_env(env):
     Plot current environment
     ----------------------------------
     """
+    import matplotlib.pyplot as plt
+
     img = env.render()
     plt.figure()
     plt.imshow(img)
@@ -195,19 +239,27 @@ def draw_gif_from_seq(seq, env, path="./gif/doorkey.gif"):
     Save gif with a given action sequence
     ----------------------------------------
     seq:
-        Action sequence, e.g [0,0,0,0] or [MF, MF, MF, MF]
+        Action sequence, e.g [0,0,0,0] or [MF, MF, MF, MF].  Any iterable
+        works, so a streaming rollout is executed as its actions arrive.
 
     env:
         The doorkey environment
+
+    Returns:
+        The list of actions that were executed
     """
+    import imageio
+
+    executed = []
     with imageio.get_writer(path, mode="I", duration=0.8) as writer:
         img = env.render()
         writer.append_data(img)
         for act in seq:
             step(env, act)
+            executed.append(act)
             img = env.render()
             writer.append_data(img)
     # print(f"GIF is written to {path}")
-    return
+    return executed
     
     